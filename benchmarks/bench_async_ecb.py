@@ -0,0 +1,39 @@
+"""
+Wall time of the async byte-at-a-time ECB attack against a local oracle server
+with artificial latency, at several concurrency limits.
+
+    python benchmarks/bench_async_ecb.py [latency_seconds]
+"""
+import asyncio
+import base64
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptopals import aio
+from cryptopals.s2 import Oracle
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'data')
+
+
+async def main(latency: float) -> None:
+    with open(os.path.join(DATA, 's2c12.txt'), 'rb') as f:
+        unknown = base64.b64decode(f.read())
+    server = await aio.serve_oracle(Oracle(os.urandom(16), unknown), latency=latency)
+    port = server.sockets[0].getsockname()[1]
+    for concurrency in (1, 4, 16, 64):
+        remote = aio.RemoteOracle('127.0.0.1', port, concurrency)
+        start = time.perf_counter()
+        result = await aio.break_ecb(remote, concurrency)
+        elapsed = time.perf_counter() - start
+        await remote.close()
+        assert result.plaintext == unknown
+        print('concurrency {:>3}: {:.2f}s, {} queries'.format(concurrency, elapsed, result.queries))
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.005))
@@ -0,0 +1,43 @@
+"""
+Lines per second of detect_single_char_xor on a synthetic challenge 4 corpus:
+random hex lines with a few english sentences, single-byte XOR'd, mixed in.
+
+    python benchmarks/bench_detect_xor.py [num_lines]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptopals.s1 import detect_single_char_xor, single_char_xor
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'data')
+
+
+def corpus(num_lines: int, seed: int = 0):
+    rng = random.Random(seed)
+    with open(os.path.join(DATA, 'english_sample.txt'), 'rb') as f:
+        text = f.read()
+    sentences = [s.strip()[:60] for s in text.split(b'.') if len(s) > 40]
+    for lineno in range(num_lines):
+        if lineno % 1000 == 0:
+            line = single_char_xor(rng.choice(sentences), rng.choice('ABCDEFGHIJ'))
+        else:
+            line = bytes(rng.randrange(256) for _ in range(30))
+        yield line.hex().encode() + b'\n'
+
+
+def main() -> None:
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lines = list(corpus(num_lines))
+    start = time.perf_counter()
+    best = detect_single_char_xor(lines, top=10)
+    elapsed = time.perf_counter() - start
+    print('{} lines in {:.2f}s: {:.0f} lines/s'.format(num_lines, elapsed, num_lines / elapsed))
+    print('best candidate: line {}, key {!r}'.format(best[0][2], best[0][0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Cost of one query to the challenge 12 Oracle, against the original implementation
+that expanded the key (and padded the plaintext twice) on every call.
+
+    python benchmarks/bench_oracle.py
+"""
+import base64
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptopals.s2 import CIPHER_BACKENDS, Oracle, get_backend, pkcs7pad
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'data')
+
+INPUT_SIZES = [0, 16, 256, 4096]
+
+
+class UncachedOracle(Oracle):
+    # The original __call__, building a cipher per query.
+    def __call__(self, bs):
+        plaintext = pkcs7pad(bs + self.unknown)
+        return CIPHER_BACKENDS[get_backend()](self.key).encrypt(pkcs7pad(bs + self.unknown, len(self.key)))
+
+
+def us_per_call(func) -> float:
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    best = min([elapsed] + timer.repeat(repeat=2, number=number))
+    return best / number * 1e6
+
+
+def main() -> None:
+    with open(os.path.join(DATA, 's2c12.txt'), 'rb') as f:
+        unknown = base64.b64decode(f.read())
+    key = os.urandom(16)
+    before, after = UncachedOracle(key, unknown), Oracle(key, unknown)
+    print('{:>10} {:>16} {:>16} {:>10}'.format('input', 'uncached (us)', 'cached (us)', 'speedup'))
+    for size in INPUT_SIZES:
+        bs = b'A' * size
+        slow = us_per_call(lambda: before(bs))
+        fast = us_per_call(lambda: after(bs))
+        print('{:>10} {:>16.2f} {:>16.2f} {:>9.1f}x'.format(size, slow, fast, slow / fast))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Throughput of the XOR primitives, before and after the bulk backend.
+
+    python benchmarks/bench_xor.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptopals.s1 import fixed_len_xor, single_char_xor, repeating_key_xor
+
+SIZES = [1 << 10, 1 << 16, 1 << 20, 1 << 23]
+
+
+def generator_xor(bs1: bytes, bs2: bytes) -> bytes:
+    # The original, byte at a time implementation.
+    return bytes(a ^ b for a, b in zip(bs1, bs2))
+
+
+def mb_per_sec(func, size: int) -> float:
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    best = min([elapsed] + timer.repeat(repeat=2, number=number))
+    return size * number / best / 1e6
+
+
+def main() -> None:
+    print('{:>10} {:>18} {:>12} {:>12} {:>12} {:>12}'.format(
+        'size', 'generator (MB/s)', 'fixed_len', 'single_char', 'repeating', 'speedup'))
+    for size in SIZES:
+        bs1, bs2 = os.urandom(size), os.urandom(size)
+        before = mb_per_sec(lambda: generator_xor(bs1, bs2), size)
+        after = mb_per_sec(lambda: fixed_len_xor(bs1, bs2), size)
+        single = mb_per_sec(lambda: single_char_xor(bs1, 'X'), size)
+        repeating = mb_per_sec(lambda: repeating_key_xor(bs1, 'ICE'), size)
+        print('{:>10} {:>18.1f} {:>12.1f} {:>12.1f} {:>12.1f} {:>11.0f}x'.format(
+            size, before, after, single, repeating, after / before))
+
+
+if __name__ == '__main__':
+    main()
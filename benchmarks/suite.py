@@ -0,0 +1,352 @@
+"""
+Throughput benchmarks for the set 1 and set 2 primitives and attacks.
+
+Run them all from the command line, optionally saving or comparing against a baseline:
+
+    python -m benchmarks [--filter NAME] [--json OUT] [--baseline FILE] [--save-baseline]
+
+or through pytest, one test per benchmark:
+
+    pytest benchmarks/suite.py
+
+Inputs are either generated (seeded, so runs are comparable) or read from the
+challenge fixtures in tests/data. Benchmarks whose dependencies are missing
+(pycrypto, for set 2) are reported as skipped.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+DATA = os.path.join(ROOT, 'tests', 'data')
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+KB = 1 << 10
+MB = 1 << 20
+
+
+class Benchmark(NamedTuple):
+    name: str
+    size: int
+    # Builds the inputs, then returns the function to time.
+    setup: Callable[[], Callable[[], object]]
+
+
+def fixture(name: str) -> bytes:
+    with open(os.path.join(DATA, name), 'rb') as f:
+        return f.read()
+
+
+def b64_fixture(name: str) -> bytes:
+    return base64.b64decode(fixture(name))
+
+
+def random_bytes(size: int, seed: int = 0) -> bytes:
+    return random.Random(seed).getrandbits(8 * size).to_bytes(size, 'big')
+
+
+def english(size: int) -> bytes:
+    text = fixture('english_sample.txt')
+    return (text * (size // len(text) + 1))[:size]
+
+
+def _fixed_len_xor(size):
+    from cryptopals.s1 import fixed_len_xor
+    bs1, bs2 = random_bytes(size, 1), random_bytes(size, 2)
+    return lambda: fixed_len_xor(bs1, bs2)
+
+
+def _hamming_dist(size):
+    from cryptopals.s1 import hamming_dist
+    bs1, bs2 = random_bytes(size, 1), random_bytes(size, 2)
+    return lambda: hamming_dist(bs1, bs2)
+
+
+def _english_score(size):
+    from cryptopals.s1 import english_score
+    bs = english(size)
+    return lambda: english_score(bs)
+
+
+def _break_single_char_xor(size):
+    from cryptopals.s1 import break_single_char_xor, single_char_xor
+    bs = single_char_xor(english(size), 'X')
+    return lambda: break_single_char_xor(bs)
+
+
+def _break_repeating_key_xor(size):
+    from cryptopals.s1 import break_repeating_key_xor, repeating_key_xor
+    bs = repeating_key_xor(english(size), 'Bring the noise')
+    return lambda: break_repeating_key_xor(bs)
+
+
+def _break_repeating_key_xor_s1c6():
+    from cryptopals.s1 import break_repeating_key_xor
+    bs = b64_fixture('s1c6.txt')
+    return lambda: break_repeating_key_xor(bs)
+
+
+def _shortest_period(size):
+    from cryptopals.period import shortest_period
+    bs = (b'Bring the noise' * (size // 15 + 1))[:size]
+    return lambda: shortest_period(bs)
+
+
+def _keysize_hints(size):
+    from cryptopals.period import keysize_hints
+    from cryptopals.s1 import repeating_key_xor
+    bs = repeating_key_xor(english(size), 'Bring the noise')
+    return lambda: keysize_hints(bs)
+
+
+def _detect_ecb(size):
+    from cryptopals.s1 import detect_ecb
+    bs = random_bytes(size)
+    return lambda: detect_ecb(bs)
+
+
+def _detect_ecb_stream(size):
+    import io
+    from cryptopals.s1 import detect_ecb_stream
+    bs = random_bytes(size)
+    return lambda: detect_ecb_stream(io.BytesIO(bs))
+
+
+def _detect_ecb_s1c8():
+    from cryptopals.s1 import detect_ecb
+    lines = [bytes.fromhex(line.decode()) for line in fixture('s1c8.txt').split()]
+    return lambda: [detect_ecb(line) for line in lines]
+
+
+def _pkcs7pad(size):
+    from cryptopals.s2 import pkcs7pad
+    bs = random_bytes(size + 3)
+    return lambda: pkcs7pad(bs, 16)
+
+
+def _pkcs7unpad(size):
+    from cryptopals.s2 import pkcs7pad, pkcs7unpad
+    bs = pkcs7pad(random_bytes(size + 3), 16)
+    return lambda: pkcs7unpad(bs, 16)
+
+
+def _cbc_encrypt(size):
+    from cryptopals.s2 import cbc_encrypt
+    bs, key = random_bytes(size), random_bytes(16, 3)
+    return lambda: cbc_encrypt(bs, key)
+
+
+def _cbc_decrypt(size):
+    from cryptopals.s2 import cbc_decrypt, cbc_encrypt
+    key = random_bytes(16, 3)
+    bs = cbc_encrypt(random_bytes(size), key)
+    return lambda: cbc_decrypt(bs, key)
+
+
+def _cbc_decrypt_parallel(size):
+    from cryptopals.s2 import cbc_decrypt, cbc_encrypt
+    key = random_bytes(16, 3)
+    bs = cbc_encrypt(random_bytes(size), key)
+    return lambda: cbc_decrypt(bs, key, workers=2)
+
+
+def _cbc_decrypt_s2c10():
+    from cryptopals.s2 import cbc_decrypt
+    bs = b64_fixture('s2c10.txt')
+    return lambda: cbc_decrypt(bs, b'YELLOW SUBMARINE')
+
+
+def _aes_backend(name):
+    def setup(size):
+        from cryptopals.s2 import aes_cipher, available_backends
+        if name not in available_backends():
+            raise ImportError('AES backend {} is not available'.format(name))
+        cipher, bs = aes_cipher(random_bytes(16, 3), name), random_bytes(size)
+        return lambda: cipher.encrypt(bs)
+    return setup
+
+
+def _classify_modes(size):
+    from cryptopals.s2 import classify_modes, encryption_oracle_samples
+    ciphertexts = [ciphertext for ciphertext, _ in encryption_oracle_samples(size // 64)]
+    return lambda: list(classify_modes(ciphertexts, planted=True))
+
+
+def _oracle_query(size):
+    from cryptopals.s2 import Oracle
+    oracle = Oracle(random_bytes(16, 4), b64_fixture('s2c12.txt'))
+    bs = random_bytes(size)
+    return lambda: oracle(bs)
+
+
+def _break_ecb_s2c12():
+    from cryptopals.s2 import Oracle, break_ecb
+    oracle = Oracle(random_bytes(16, 4), b64_fixture('s2c12.txt'))
+    return lambda: break_ecb(oracle)
+
+
+def _break_ecb_s2c14():
+    from cryptopals.s2 import PrefixOracle, break_ecb_batched
+    oracle = PrefixOracle(random_bytes(16, 4), b64_fixture('s2c12.txt'), random_bytes(37, 5))
+    return lambda: break_ecb_batched(oracle)
+
+
+def _padding_oracle_s3c17():
+    from cryptopals.s3 import PaddingOracle, padding_oracle_attack
+    oracle = PaddingOracle([base64.b64decode(line) for line in fixture('s3c17.txt').split()],
+                           random_bytes(16, 4))
+    ciphertext, iv = oracle.encrypt()
+    return lambda: padding_oracle_attack(oracle, ciphertext, iv)
+
+
+def _ctr_crypt(size):
+    from cryptopals.s3 import ctr_crypt
+    bs, key = random_bytes(size), random_bytes(16, 3)
+    return lambda: ctr_crypt(bs, key)
+
+
+def _ctr_crypt_parallel(size):
+    from cryptopals.s3 import ctr_crypt
+    bs, key = random_bytes(size), random_bytes(16, 3)
+    return lambda: ctr_crypt(bs, key, workers=2)
+
+
+def _sized(name: str, factory: Callable, sizes: List[int]) -> List[Benchmark]:
+    return [Benchmark('{}[{}]'.format(name, size), size, lambda size=size: factory(size))
+            for size in sizes]
+
+
+BENCHMARKS: List[Benchmark] = (
+    _sized('fixed_len_xor', _fixed_len_xor, [KB, 64 * KB, MB]) +
+    _sized('hamming_dist', _hamming_dist, [KB, 64 * KB, MB]) +
+    _sized('english_score', _english_score, [KB, 64 * KB]) +
+    _sized('break_single_char_xor', _break_single_char_xor, [60, KB, 64 * KB]) +
+    _sized('break_repeating_key_xor', _break_repeating_key_xor, [4 * KB, 64 * KB]) +
+    [Benchmark('break_repeating_key_xor[s1c6]', len(b64_fixture('s1c6.txt')),
+               _break_repeating_key_xor_s1c6)] +
+    _sized('shortest_period', _shortest_period, [KB, MB]) +
+    _sized('keysize_hints', _keysize_hints, [4 * KB, 64 * KB]) +
+    _sized('detect_ecb', _detect_ecb, [KB, MB]) +
+    _sized('detect_ecb_stream', _detect_ecb_stream, [MB]) +
+    [Benchmark('detect_ecb[s1c8]', len(fixture('s1c8.txt')) // 2, _detect_ecb_s1c8)] +
+    _sized('pkcs7pad', _pkcs7pad, [KB, MB]) +
+    _sized('pkcs7unpad', _pkcs7unpad, [KB, MB]) +
+    _sized('aes_encrypt_pycryptodome', _aes_backend('pycryptodome'), [64 * KB]) +
+    _sized('aes_encrypt_cryptography', _aes_backend('cryptography'), [64 * KB]) +
+    _sized('aes_encrypt_python', _aes_backend('python'), [KB, 64 * KB]) +
+    _sized('oracle_query', _oracle_query, [16, KB]) +
+    _sized('classify_modes', _classify_modes, [64 * KB, 4 * MB]) +
+    _sized('cbc_encrypt', _cbc_encrypt, [KB, 64 * KB]) +
+    _sized('cbc_decrypt', _cbc_decrypt, [KB, 64 * KB, 16 * MB]) +
+    _sized('cbc_decrypt_parallel', _cbc_decrypt_parallel, [64 * MB]) +
+    [Benchmark('cbc_decrypt[s2c10]', len(b64_fixture('s2c10.txt')), _cbc_decrypt_s2c10),
+     Benchmark('break_ecb[s2c12]', len(b64_fixture('s2c12.txt')), _break_ecb_s2c12),
+     Benchmark('break_ecb[s2c14]', len(b64_fixture('s2c12.txt')), _break_ecb_s2c14),
+     Benchmark('padding_oracle_attack[s3c17]', 64, _padding_oracle_s3c17)] +
+    _sized('ctr_crypt', _ctr_crypt, [KB, 64 * KB, 16 * MB]) +
+    _sized('ctr_crypt_parallel', _ctr_crypt_parallel, [64 * MB])
+)
+
+
+def measure(bench: Benchmark, repeat: int = 3) -> Dict[str, float]:
+    """
+    Best time per call out of `repeat` timing runs, each long enough to be meaningful.
+    """
+    timer = timeit.Timer(bench.setup())
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {'seconds': seconds, 'bytes': bench.size, 'mb_per_s': bench.size / seconds / 1e6}
+
+
+def run(benchmarks: List[Benchmark], repeat: int = 3, out=sys.stdout) -> Dict:
+    results: Dict[str, Dict] = {}
+    for bench in benchmarks:
+        try:
+            result = measure(bench, repeat)
+        except ImportError as e:
+            results[bench.name] = {'skipped': str(e)}
+            print('{:<36} skipped: {}'.format(bench.name, e), file=out)
+            continue
+        results[bench.name] = result
+        print('{:<36} {:>12.6f}s {:>10.2f} MB/s'.format(
+            bench.name, result['seconds'], result['mb_per_s']), file=out)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Names of the benchmarks that got slower than the baseline by more than `tolerance`.
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name, {})
+        if 'seconds' not in result or 'seconds' not in before:
+            continue
+        if result['seconds'] > before['seconds'] * (1 + tolerance):
+            regressions.append('{}: {:.6f}s -> {:.6f}s ({:+.0%})'.format(
+                name, before['seconds'], result['seconds'],
+                result['seconds'] / before['seconds'] - 1))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown against the baseline, as a fraction')
+    args = parser.parse_args(argv)
+
+    selected = [b for b in BENCHMARKS if args.filter in b.name]
+    report = run(selected, args.repeat)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    return 1 if regressions else 0
+
+
+# pytest entry point, one smoke run per benchmark.
+try:
+    import pytest
+except ImportError:  # pragma: no cover
+    pass
+else:
+    @pytest.mark.parametrize('bench', BENCHMARKS, ids=[b.name for b in BENCHMARKS])
+    def test_benchmark(bench):
+        try:
+            result = measure(bench, repeat=1)
+        except ImportError as e:
+            pytest.skip(str(e))
+        assert result['seconds'] > 0
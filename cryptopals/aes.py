@@ -0,0 +1,202 @@
+"""
+A table based (T-table) AES in pure Python, for when no AES library is installed.
+
+Encryption and decryption always work on any number of independent 16 byte blocks
+at once, like an ECB mode cipher object. With NumPy installed, all the blocks of
+a call go through every round together, as vectorized table lookups.
+
+The round function is the usual 32 bit one: SubBytes, ShiftRows and MixColumns
+folded into four 256 entry tables, so a round costs 16 lookups and XORs per block.
+"""
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+BLOCK_SIZE = 16
+KEY_SIZES = (16, 24, 32)
+
+
+def _xtime(a: int) -> int:
+    a <<= 1
+    return a ^ 0x11b if a & 0x100 else a
+
+
+def _gf_mul(a: int, b: int) -> int:
+    product = 0
+    while b:
+        if b & 1:
+            product ^= a
+        a = _xtime(a)
+        b >>= 1
+    return product
+
+
+def _sboxes() -> Tuple[List[int], List[int]]:
+    # The multiplicative inverse in GF(2^8), followed by the affine transform.
+    # Inverses come from the powers of the generator 3: 3^i * 3^(255 - i) = 1
+    powers = [1]
+    for _ in range(254):
+        powers.append(powers[-1] ^ _xtime(powers[-1]))
+    inverse = [0] * 256
+    for i, p in enumerate(powers):
+        inverse[p] = powers[(255 - i) % 255]
+    sbox = [0] * 256
+    for a in range(256):
+        x = inverse[a]
+        s = x
+        for shift in range(1, 5):
+            s ^= ((x << shift) | (x >> (8 - shift))) & 0xff
+        sbox[a] = s ^ 0x63
+    inv_sbox = [0] * 256
+    for a, s in enumerate(sbox):
+        inv_sbox[s] = a
+    return sbox, inv_sbox
+
+
+def _rotations(column: Sequence[int]) -> List[List[int]]:
+    # T1..T3 are T0 rotated right by one to three bytes.
+    tables = [list(column)]
+    for _ in range(3):
+        tables.append([(w >> 8) | ((w & 0xff) << 24) for w in tables[-1]])
+    return tables
+
+
+SBOX, INV_SBOX = _sboxes()
+
+# Te0[a] is the MixColumns column of S[a] in the first row: (2, 1, 1, 3) * S[a]
+TE = _rotations([(_gf_mul(s, 2) << 24) | (s << 16) | (s << 8) | _gf_mul(s, 3) for s in SBOX])
+# Td0[a] is the InvMixColumns column of S^-1[a]: (14, 9, 13, 11) * S^-1[a]
+TD = _rotations([(_gf_mul(s, 14) << 24) | (_gf_mul(s, 9) << 16) | (_gf_mul(s, 13) << 8) | _gf_mul(s, 11)
+                 for s in INV_SBOX])
+# InvMixColumns on its own, for the decryption key schedule.
+_INV_MIX = _rotations([(_gf_mul(a, 14) << 24) | (_gf_mul(a, 9) << 16) | (_gf_mul(a, 13) << 8) | _gf_mul(a, 11)
+                       for a in range(256)])
+
+_RCON = [0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40, 0x80, 0x1b, 0x36]
+
+
+def expand_key(key: bytes) -> List[int]:
+    """
+    The AES key schedule, as 4 * (rounds + 1) big endian words.
+    """
+    if len(key) not in KEY_SIZES:
+        raise ValueError('AES key must be either 16, 24, or 32 bytes long')
+    nk = len(key) // 4
+    rounds = nk + 6
+    words = [int.from_bytes(key[i:i + 4], 'big') for i in range(0, len(key), 4)]
+    for i in range(nk, 4 * (rounds + 1)):
+        w = words[-1]
+        if i % nk == 0:
+            w = ((w << 8) | (w >> 24)) & 0xffffffff
+            w = _sub_word(w) ^ (_RCON[i // nk - 1] << 24)
+        elif nk > 6 and i % nk == 4:
+            w = _sub_word(w)
+        words.append(words[i - nk] ^ w)
+    return words
+
+
+def _sub_word(w: int) -> int:
+    return ((SBOX[w >> 24] << 24) | (SBOX[(w >> 16) & 0xff] << 16) |
+            (SBOX[(w >> 8) & 0xff] << 8) | SBOX[w & 0xff])
+
+
+def _inverse_schedule(words: List[int]) -> List[int]:
+    # The "equivalent inverse cipher" schedule: round keys in reverse order,
+    # with InvMixColumns applied to all but the first and the last.
+    rounds = len(words) // 4 - 1
+    inverse = []
+    for r in range(rounds, -1, -1):
+        round_key = words[4 * r:4 * r + 4]
+        if 0 < r < rounds:
+            round_key = [_INV_MIX[0][w >> 24] ^ _INV_MIX[1][(w >> 16) & 0xff] ^
+                         _INV_MIX[2][(w >> 8) & 0xff] ^ _INV_MIX[3][w & 0xff]
+                         for w in round_key]
+        inverse.extend(round_key)
+    return inverse
+
+
+class AES:
+    """
+    An AES cipher object in ECB mode: encrypt() and decrypt() take any number
+    of whole blocks and transform each one independently.
+    """
+    block_size = BLOCK_SIZE
+
+    def __init__(self, key: bytes) -> None:
+        key = bytes(key)
+        self._enc: List[int] = expand_key(key)
+        self._dec: List[int] = _inverse_schedule(self._enc)
+        self.rounds: int = len(self._enc) // 4 - 1
+
+    def encrypt(self, bs: bytes) -> bytes:
+        return self._crypt(bs, self._enc, TE, SBOX, (1, 2, 3))
+
+    def decrypt(self, bs: bytes) -> bytes:
+        return self._crypt(bs, self._dec, TD, INV_SBOX, (3, 2, 1))
+
+    def _crypt(self, bs: bytes, round_keys: List[int], tables: List[List[int]],
+               sbox: List[int], shifts: Tuple[int, int, int]) -> bytes:
+        if len(bs) % BLOCK_SIZE:
+            raise ValueError('Data must be a multiple of 16 bytes in length')
+        if numpy is not None and len(bs) > BLOCK_SIZE:
+            return _crypt_numpy(bytes(bs), round_keys, tables, sbox, shifts, self.rounds)
+        bs = bytes(bs)
+        out = bytearray(len(bs))
+        for i in range(0, len(bs), BLOCK_SIZE):
+            out[i:i + BLOCK_SIZE] = _crypt_block(bs[i:i + BLOCK_SIZE], round_keys, tables,
+                                                 sbox, shifts, self.rounds)
+        return bytes(out)
+
+
+def _crypt_block(block: bytes, rk: List[int], tables: List[List[int]], sbox: List[int],
+                 shifts: Tuple[int, int, int], rounds: int) -> bytes:
+    t0, t1, t2, t3 = tables
+    # which state word feeds each table, for each output word (ShiftRows)
+    columns = [(i, (i + shifts[0]) % 4, (i + shifts[1]) % 4, (i + shifts[2]) % 4) for i in range(4)]
+    s = [int.from_bytes(block[j:j + 4], 'big') ^ rk[k] for k, j in enumerate(range(0, 16, 4))]
+    for k in range(4, 4 * rounds, 4):
+        s = [t0[s[w] >> 24] ^ t1[(s[x] >> 16) & 0xff] ^ t2[(s[y] >> 8) & 0xff] ^ t3[s[z] & 0xff] ^ rk[k + i]
+             for i, (w, x, y, z) in enumerate(columns)]
+    k = 4 * rounds
+    out = 0
+    for i, (w, x, y, z) in enumerate(columns):
+        word = ((sbox[s[w] >> 24] << 24) | (sbox[(s[x] >> 16) & 0xff] << 16) |
+                (sbox[(s[y] >> 8) & 0xff] << 8) | sbox[s[z] & 0xff]) ^ rk[k + i]
+        out = (out << 32) | word
+    return out.to_bytes(16, 'big')
+
+
+_NUMPY_TABLES = {}
+
+
+def _as_array(table: List[int]):
+    # Tables are converted once, and looked up by identity.
+    key = id(table)
+    if key not in _NUMPY_TABLES:
+        _NUMPY_TABLES[key] = numpy.array(table, dtype=numpy.uint32)
+    return _NUMPY_TABLES[key]
+
+
+def _crypt_numpy(bs: bytes, rk: List[int], tables: List[List[int]], sbox: List[int],
+                 shifts: Tuple[int, int, int], rounds: int) -> bytes:
+    # The same rounds as _crypt_block, on one column of words per block position.
+    t0, t1, t2, t3 = (_as_array(t) for t in tables)
+    box = _as_array(sbox)
+    keys = numpy.array(rk, dtype=numpy.uint32)
+    a, b, c = shifts
+    state = numpy.frombuffer(bs, dtype='>u4').reshape(-1, 4).astype(numpy.uint32)
+    s = [state[:, i] ^ keys[i] for i in range(4)]
+    for r in range(1, rounds):
+        k = 4 * r
+        s = [t0[s[i] >> 24] ^ t1[(s[(i + a) % 4] >> 16) & 0xff] ^
+             t2[(s[(i + b) % 4] >> 8) & 0xff] ^ t3[s[(i + c) % 4] & 0xff] ^ keys[k + i]
+             for i in range(4)]
+    k = 4 * rounds
+    out = numpy.empty_like(state)
+    for i in range(4):
+        out[:, i] = ((box[s[i] >> 24] << 24) | (box[(s[(i + a) % 4] >> 16) & 0xff] << 16) |
+                     (box[(s[(i + b) % 4] >> 8) & 0xff] << 8) | box[s[(i + c) % 4] & 0xff]) ^ keys[k + i]
+    return out.astype('>u4').tobytes()
@@ -0,0 +1,221 @@
+"""
+Asyncio versions of the set 2 ECB attacks, for oracles that sit behind a network.
+
+When every query is a round trip, the attacks are bound by latency rather than CPU,
+so independent queries are sent concurrently, up to a configurable limit.
+
+An async oracle is any callable taking the attacker bytes and returning an awaitable
+of the ciphertext. AsyncOracle adapts a local Oracle, with artificial latency, and
+serve_oracle/RemoteOracle put one behind a local TCP server.
+"""
+import asyncio
+import struct
+import time
+from itertools import count
+
+from cryptopals.s2 import ECBAttackResult, InstrumentedOracle, candidate_order
+
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+AsyncOracleType = Callable[[bytes], Awaitable[bytes]]
+
+# Frames on the wire are a 4 byte big endian length followed by the payload.
+_LENGTH = struct.Struct('>I')
+
+
+class AsyncOracle:
+    """
+    A local Oracle made to look remote: every call waits `latency` seconds.
+    """
+    def __init__(self, oracle: Callable[[bytes], bytes], latency: float = 0.0) -> None:
+        self.oracle = oracle
+        self.latency: float = latency
+
+    async def __call__(self, bs: bytes) -> bytes:
+        await asyncio.sleep(self.latency)
+        return self.oracle(bs)
+
+
+class InstrumentedAsyncOracle(InstrumentedOracle):
+    """
+    InstrumentedOracle for async oracles: latency is how long each query was awaited.
+    """
+    async def __call__(self, bs: bytes) -> bytes:
+        bs = bytes(bs)
+        resp = self._cached(bs)
+        if resp is None:
+            start = time.perf_counter()
+            resp = await self.oracle(bs)
+            self._record(bs, resp, time.perf_counter() - start)
+        self.bytes_in += len(bs)
+        self.bytes_out += len(resp)
+        return resp
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    size, = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return await reader.readexactly(size)
+
+
+def _frame(bs: bytes) -> bytes:
+    return _LENGTH.pack(len(bs)) + bs
+
+
+async def serve_oracle(oracle: Callable[[bytes], bytes], host: str = '127.0.0.1', port: int = 0,
+                       latency: float = 0.0) -> asyncio.AbstractServer:
+    """
+    Serve `oracle` over TCP, answering every request after `latency` seconds.
+    Use port 0 to pick any free port, then read it from server.sockets.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_frame(reader)
+                await asyncio.sleep(latency)
+                writer.write(_frame(oracle(request)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # the client went away
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+class RemoteOracle:
+    """
+    Client for serve_oracle. Up to `connections` queries are in flight at once,
+    one per connection.
+    """
+    def __init__(self, host: str, port: int, connections: int = 16) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.connections: int = connections
+        self._pool: Optional[asyncio.Queue] = None
+        self._opened: List[asyncio.StreamWriter] = []
+
+    async def __call__(self, bs: bytes) -> bytes:
+        if self._pool is None:
+            self._pool = asyncio.Queue()
+            for _ in range(self.connections):
+                self._pool.put_nowait(None)
+        conn = await self._pool.get()
+        try:
+            if conn is None:
+                conn = await asyncio.open_connection(self.host, self.port)
+                self._opened.append(conn[1])
+            reader, writer = conn
+            writer.write(_frame(bytes(bs)))
+            await writer.drain()
+            resp = await _read_frame(reader)
+        except BaseException:
+            # The response may still be on its way: a query reusing this
+            # connection would read it as its own. Open a new one instead.
+            if conn is not None:
+                conn[1].close()
+                self._opened.remove(conn[1])
+            self._pool.put_nowait(None)
+            raise
+        self._pool.put_nowait(conn)
+        return resp
+
+    async def close(self) -> None:
+        for writer in self._opened:
+            writer.close()
+            await writer.wait_closed()
+        self._opened.clear()
+        self._pool = None
+
+
+def _limited(oracle: AsyncOracleType, concurrency: int) -> AsyncOracleType:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def query(bs: bytes) -> bytes:
+        async with semaphore:
+            return await oracle(bs)
+    return query
+
+
+async def _first_length_change(oracle: AsyncOracleType, concurrency: int) -> Tuple[int, int, int]:
+    """
+    Probe b'A' * n for growing n, `concurrency` probes at a time,
+    until the ciphertext length changes.
+    Returns the initial length, the first n that changed it, and the new length.
+    """
+    init_len = len(await oracle(b''))
+    for wave in count(0):
+        sizes = range(wave * concurrency + 1, (wave + 1) * concurrency + 1)
+        resps = await asyncio.gather(*(oracle(b'A' * n) for n in sizes))
+        for n, resp in zip(sizes, resps):
+            if len(resp) != init_len:
+                return init_len, n, len(resp)
+    return init_len, -1, init_len
+
+
+async def guess_blocksize(oracle: AsyncOracleType, concurrency: int = 16) -> int:
+    """
+    S2C12 - Byte-at-a-time ECB decryption (Simple)
+    https://cryptopals.com/sets/2/challenges/12
+
+    See cryptopals.s2.guess_blocksize, probes are sent `concurrency` at a time.
+    """
+    init_len, _, cur_len = await _first_length_change(oracle, concurrency)
+    return cur_len - init_len
+
+
+async def guess_unknown_string_size(oracle: AsyncOracleType, concurrency: int = 16) -> int:
+    """
+    S2C12 - Byte-at-a-time ECB decryption (Simple)
+    https://cryptopals.com/sets/2/challenges/12
+
+    See cryptopals.s2.guess_unknown_string_size, probes are sent `concurrency` at a time.
+    """
+    init_len, guess, _ = await _first_length_change(oracle, concurrency)
+    return init_len - guess
+
+
+async def break_ecb(oracle: AsyncOracleType, concurrency: int = 16, batch: int = 16) -> ECBAttackResult:
+    """
+    S2C12 - Byte-at-a-time ECB decryption (Simple)
+    https://cryptopals.com/sets/2/challenges/12
+
+    The dictionary attack of cryptopals.s2.break_ecb_batched, with every query
+    that doesn't depend on the previous byte sent concurrently:
+    all short-by-n queries up front, and for each byte, all 256 candidates
+    spread over queries of `batch` dictionary blocks.
+    At most `concurrency` queries are in flight at any time.
+
+    Like break_ecb_batched, the result carries the oracle stats. Repeated probes
+    are cached, and the latencies don't include waiting for a free slot.
+    """
+    instrumented = InstrumentedAsyncOracle(oracle, cache_size=64)
+    limited = _limited(instrumented, concurrency)
+    blocksize = await guess_blocksize(limited, concurrency)
+    unknown_string_size = await guess_unknown_string_size(limited, concurrency)
+
+    # short_by_n[n] = oracle(b"A" * n), for n in range(blocksize)
+    short_by_n = await asyncio.gather(*(limited(b'A' * n) for n in range(blocksize)))
+
+    unknown_string = b''
+    for i in range(unknown_string_size):
+        n = blocksize - 1 - i % blocksize
+        block = i // blocksize
+        target = short_by_n[n][block * blocksize:(block + 1) * blocksize]
+
+        window = (b'A' * (blocksize - 1) + unknown_string)[-(blocksize - 1):]
+        previous = unknown_string[-1] if unknown_string else None
+        candidates = candidate_order(previous=previous)
+        groups = [candidates[start:start + batch] for start in range(0, 256, batch)]
+        resps = await asyncio.gather(*(limited(b''.join(window + bytes([c]) for c in group))
+                                       for group in groups))
+        found = None
+        for group, resp in zip(groups, resps):
+            blocks = [resp[k * blocksize:(k + 1) * blocksize] for k in range(len(group))]
+            if target in blocks:
+                found = group[blocks.index(target)]
+                break
+        if found is None:
+            break
+        unknown_string += bytes([found])
+    return ECBAttackResult(unknown_string, instrumented.stats())
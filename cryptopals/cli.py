@@ -0,0 +1,355 @@
+"""
+Command line driver for the set 1 and set 2 attacks.
+
+    python -m cryptopals SUBCOMMAND [FILE ...] [options]
+
+Input comes from the files given, or stdin, in hex, base64 or raw encoding.
+By default every line is an independent record, processed as it is read;
+--whole treats each input as a single record instead.
+Results are written to stdout as JSON Lines, one object per record.
+
+Subcommands only import what they use, so that the XOR commands start fast
+and never load an AES library.
+"""
+import argparse
+import base64
+import codecs
+import json
+import sys
+from contextlib import ExitStack
+from functools import partial
+from itertools import islice
+from operator import itemgetter
+
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+# Records are handed to worker processes this many at a time.
+BATCH = 256
+# Bytes read at a time when streaming a whole input.
+CHUNK_SIZE = 1 << 16
+
+_ENCODINGS = ('hex', 'base64', 'raw')
+
+
+def _decode(line: bytes, encoding: str) -> bytes:
+    from cryptopals.s1 import LINE_DECODERS
+    return LINE_DECODERS[encoding](line)
+
+
+def _text(bs: bytes) -> str:
+    return bs.decode('utf-8', 'backslashreplace')
+
+
+def _open_inputs(paths: List[str]) -> Iterator[IO[bytes]]:
+    for path in paths or ['-']:
+        if path == '-':
+            yield sys.stdin.buffer
+        else:
+            with open(path, 'rb') as f:
+                yield f
+
+
+def _name(f: IO[bytes]) -> str:
+    return '-' if f is sys.stdin.buffer else f.name
+
+
+def _whole(f: IO[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    The decoded contents of `f`, CHUNK_SIZE at a time. Whitespace between
+    hex or base64 characters is dropped, as in multi-line challenge files.
+    """
+    # hex decodes in pairs of characters, base64 in quads
+    unit = {'hex': 2, 'base64': 4, 'raw': 1}[encoding]
+    pending = b''
+    for chunk in iter(partial(f.read, CHUNK_SIZE), b''):
+        if encoding == 'raw':
+            yield chunk
+            continue
+        pending += b''.join(chunk.split())
+        size = len(pending) - len(pending) % unit
+        if size:
+            yield _decode(pending[:size], encoding)
+            pending = pending[size:]
+    if pending:
+        # let the decoder complain about a truncated input
+        yield _decode(pending, encoding)
+
+
+def _records(args: argparse.Namespace) -> Iterator[Dict]:
+    """
+    Numbered records from all inputs, still encoded when read line by line.
+    """
+    for f in _open_inputs(args.inputs):
+        name = _name(f)
+        if args.whole:
+            yield {'file': name, 'record': 0, 'data': b''.join(_whole(f, args.encoding)), 'decoded': True}
+        else:
+            for lineno, line in enumerate(f):
+                if line.strip() or args.encoding == 'raw':
+                    yield {'file': name, 'record': lineno, 'data': line, 'decoded': False}
+
+
+def _run(func: Callable[[bytes], Dict], encoding: str, record: Dict) -> Dict:
+    # Runs in the workers: decoding happens there too.
+    result = {'file': record['file'], 'record': record['record']}
+    try:
+        bs = record['data'] if record['decoded'] else _decode(record['data'], encoding)
+        result.update(func(bs))
+    except ValueError as e:
+        result['error'] = str(e)
+    return result
+
+
+def _map_records(func: Callable[[bytes], Dict], args: argparse.Namespace) -> Iterator[Dict]:
+    """
+    Results of `func` over every record, in input order.
+    With --workers, BATCH records at a time are spread over a process pool.
+    """
+    run = partial(_run, func, args.encoding)
+    records = _records(args)
+    if not args.workers:
+        yield from map(run, records)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(args.workers) as pool:
+        while True:
+            batch = list(islice(records, BATCH * args.workers))
+            if not batch:
+                break
+            yield from pool.map(run, batch, chunksize=BATCH)
+
+
+# Per record commands. Each one turns decoded bytes into the fields of its result.
+
+def _crack_xor(bs: bytes) -> Dict:
+    from cryptopals.s1 import break_single_char_xor, single_char_xor
+    key, score = break_single_char_xor(bs)
+    if not key:
+        # nothing decrypts to printable text
+        return {'key': None, 'score': None, 'plaintext': None}
+    return {'key': key, 'score': score, 'plaintext': _text(single_char_xor(bs, key))}
+
+
+def _crack_repeating_xor(low: int, high: int, method: str, workers: Optional[int], bs: bytes) -> Dict:
+    from cryptopals.s1 import break_repeating_key_xor, repeating_key_xor
+    key = break_repeating_key_xor(bs, low, high, workers=workers, method=method)
+    return {'key': key, 'keysize': len(key), 'plaintext': _text(repeating_key_xor(bs, key))}
+
+
+def _detect_ecb(blocksize: int, bs: bytes) -> Dict:
+    from cryptopals.s1 import ecb_repetitions
+    repeats, total = ecb_repetitions(bs, blocksize)
+    return {'ecb': repeats > 0, 'repeats': repeats, 'blocks': total,
+            'score': repeats / total if total else 0.0}
+
+
+_OUTPUT_ENCODERS: Dict[str, Callable[[bytes], str]] = {
+    'hex': lambda bs: bs.hex(),
+    'base64': lambda bs: base64.b64encode(bs).decode(),
+    'text': _text,
+}
+
+
+def _cbc(decrypt: bool, key: bytes, iv: Optional[bytes], output: str, bs: bytes) -> Dict:
+    from cryptopals.s2 import cbc_decrypt, cbc_encrypt
+    if decrypt:
+        return {'plaintext': _OUTPUT_ENCODERS[output](cbc_decrypt(bs, key, iv))}
+    return {'ciphertext': _OUTPUT_ENCODERS[output](cbc_encrypt(bs, key, iv))}
+
+
+def _write(result: Dict, out: IO[str]) -> None:
+    out.write(json.dumps(result))
+    out.write('\n')
+
+
+def _detect_xor(encoding: str, top: int, start: int, lines: Iterable[bytes]) -> Tuple[List, List]:
+    # Runs in the workers: the best `top` of `lines`, numbered from `start`,
+    # and the lines that didn't decode.
+    from cryptopals.s1 import detect_single_char_xor
+    errors: List[Tuple[int, str]] = []
+    found = detect_single_char_xor(lines, encoding, top,
+                                   on_error=lambda lineno, e: errors.append((start + lineno, str(e))))
+    return [(score, start + lineno, key, bs) for key, score, lineno, bs in found], errors
+
+
+def _detect_xor_batches(f: IO[bytes], args: argparse.Namespace,
+                        mapper: Callable = map) -> Iterator[Tuple[List, List]]:
+    """
+    detect-xor results for the lines of `f`, BATCH lines at a time.
+    With --workers, `mapper` is a pool's map and every worker gets a batch.
+    """
+    detect = partial(_detect_xor, args.encoding, args.top)
+    lines = iter(f)
+    start = 0
+    while True:
+        batches = [list(islice(lines, BATCH)) for _ in range(args.workers or 1)]
+        batches = [batch for batch in batches if batch]
+        if not batches:
+            break
+        starts = [start + BATCH * i for i in range(len(batches))]
+        start += sum(map(len, batches))
+        yield from mapper(detect, starts, batches)
+
+
+def cmd_detect_xor(args: argparse.Namespace, out: IO[str]) -> None:
+    """
+    The `top` lines most likely to be single-byte XOR'd, over all inputs.
+    Lines that don't decode get an error record as they are met.
+    """
+    from cryptopals.s1 import single_char_xor
+    with ExitStack() as stack:
+        mapper: Callable = map
+        if args.workers:
+            from concurrent.futures import ProcessPoolExecutor
+            mapper = stack.enter_context(ProcessPoolExecutor(args.workers)).map
+        # Each batch keeps its own `top`, the best of those are the overall `top`.
+        candidates: List[Tuple[float, str, int, str, bytes]] = []
+        for f in _open_inputs(args.inputs):
+            name = _name(f)
+            for found, errors in _detect_xor_batches(f, args, mapper):
+                for lineno, error in errors:
+                    _write({'file': name, 'record': lineno, 'error': error}, out)
+                candidates.extend((score, name, lineno, key, bs) for score, lineno, key, bs in found)
+                candidates = sorted(candidates, key=itemgetter(0))[:args.top]
+    for score, name, lineno, key, bs in candidates:
+        _write({'file': name, 'record': lineno, 'key': key, 'score': score,
+                'plaintext': _text(single_char_xor(bs, key))}, out)
+
+
+def cmd_crack_xor(args: argparse.Namespace, out: IO[str]) -> None:
+    for result in _map_records(_crack_xor, args):
+        _write(result, out)
+
+
+def cmd_crack_repeating_xor(args: argparse.Namespace, out: IO[str]) -> None:
+    # A single whole input gets the workers to itself, to crack its columns.
+    inner = args.workers if args.whole else None
+    if args.whole:
+        args.workers = None
+    func = partial(_crack_repeating_xor, args.low, args.high, args.method, inner)
+    for result in _map_records(func, args):
+        _write(result, out)
+
+
+def cmd_detect_ecb(args: argparse.Namespace, out: IO[str]) -> None:
+    for result in _map_records(partial(_detect_ecb, args.blocksize), args):
+        _write(result, out)
+
+
+def _cbc_command(decrypt: bool, args: argparse.Namespace, out: IO[str]) -> None:
+    key = args.key.encode() if args.key is not None else bytes.fromhex(args.key_hex)
+    iv = bytes.fromhex(args.iv_hex) if args.iv_hex else None
+    output = args.output or ('text' if decrypt else 'base64')
+    if not args.whole:
+        for result in _map_records(partial(_cbc, decrypt, key, iv, output), args):
+            _write(result, out)
+        return
+
+    # Whole inputs are streamed through the cipher, so only the encoded result
+    # is held in memory. It is written out once finalize() accepts the padding:
+    # a failed input gets an error record, like a failed line does, and none
+    # of its unauthenticated plaintext.
+    from cryptopals.s2 import CBCDecryptor, CBCEncryptor
+    field = 'plaintext' if decrypt else 'ciphertext'
+    for f in _open_inputs(args.inputs):
+        head = '{{"file": {}, "record": 0'.format(json.dumps(_name(f)))
+        try:
+            cipher = (CBCDecryptor if decrypt else CBCEncryptor)(key, iv)
+            encoder = _StreamEncoder(output)
+            pieces = [encoder.encode(cipher.update(chunk)) for chunk in _whole(f, args.encoding)]
+            pieces.append(encoder.encode(cipher.finalize(), final=True))
+        except ValueError as e:
+            out.write('{}, "error": {}}}\n'.format(head, json.dumps(str(e))))
+            continue
+        out.write('{}, "{}": "'.format(head, field))
+        out.writelines(pieces)
+        out.write('"}\n')
+
+
+class _StreamEncoder:
+    """
+    Encodes a byte stream piece by piece into the body of a JSON string.
+    """
+    def __init__(self, output: str) -> None:
+        self.output: str = output
+        self._pending: bytes = b''
+        self._decoder = codecs.getincrementaldecoder('utf-8')('backslashreplace')
+
+    def encode(self, bs: bytes, final: bool = False) -> str:
+        if self.output == 'hex':
+            return bs.hex()
+        if self.output == 'base64':
+            # base64 encodes whole groups of 3 bytes
+            bs = self._pending + bs
+            size = len(bs) if final else len(bs) - len(bs) % 3
+            self._pending = bs[size:]
+            return base64.b64encode(bs[:size]).decode()
+        return json.dumps(self._decoder.decode(bs, final))[1:-1]
+
+
+def _add_input_args(parser: argparse.ArgumentParser, encoding: str, whole: bool = False) -> None:
+    parser.add_argument('inputs', nargs='*', metavar='FILE', help='input files, stdin if none or -')
+    parser.add_argument('--encoding', '-e', choices=_ENCODINGS, default=encoding,
+                        help='input encoding (default: %(default)s)')
+    parser.add_argument('--whole', action='store_true', default=whole,
+                        help='treat each input as a single record' + (' (the default)' if whole else ''))
+    parser.add_argument('--lines', dest='whole', action='store_false',
+                        help='treat every line as a record' + ('' if whole else ' (the default)'))
+    parser.add_argument('--workers', '-j', type=int, default=None,
+                        help='process records on this many processes')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m cryptopals', description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', metavar='SUBCOMMAND')
+    commands.required = True
+
+    detect_xor = commands.add_parser('detect-xor', help='find the lines most likely single-byte XOR encrypted')
+    detect_xor.add_argument('inputs', nargs='*', metavar='FILE', help='input files, stdin if none or -')
+    detect_xor.add_argument('--encoding', '-e', choices=_ENCODINGS, default='hex')
+    detect_xor.add_argument('--top', type=int, default=1, help='number of candidates to report')
+    detect_xor.add_argument('--workers', '-j', type=int, default=None,
+                            help='score lines on this many processes')
+    detect_xor.set_defaults(func=cmd_detect_xor)
+
+    crack_xor = commands.add_parser('crack-xor', help='break single-byte XOR')
+    _add_input_args(crack_xor, 'hex')
+    crack_xor.set_defaults(func=cmd_crack_xor)
+
+    crack_repeating = commands.add_parser('crack-repeating-xor', help='break repeating-key XOR')
+    _add_input_args(crack_repeating, 'base64', whole=True)
+    crack_repeating.add_argument('--low', type=int, default=2, help='smallest keysize to try')
+    crack_repeating.add_argument('--high', type=int, default=100, help='largest keysize to try, exclusive')
+    crack_repeating.add_argument('--method', choices=('hamming', 'ic'), default='hamming',
+                                 help='keysize ranking, see rank_keysizes')
+    crack_repeating.set_defaults(func=cmd_crack_repeating_xor)
+
+    detect_ecb = commands.add_parser('detect-ecb', help='score records by repeated blocks')
+    _add_input_args(detect_ecb, 'hex')
+    detect_ecb.add_argument('--blocksize', type=int, default=16)
+    detect_ecb.set_defaults(func=cmd_detect_ecb)
+
+    for name, decrypt in [('cbc-encrypt', False), ('cbc-decrypt', True)]:
+        cbc = commands.add_parser(name, help='AES-CBC ' + name[4:])
+        _add_input_args(cbc, 'raw' if not decrypt else 'base64', whole=True)
+        key = cbc.add_mutually_exclusive_group(required=True)
+        key.add_argument('--key', help='the key, as text')
+        key.add_argument('--key-hex', help='the key, hex encoded')
+        cbc.add_argument('--iv-hex', help='the IV, hex encoded (default: all zeros)')
+        cbc.add_argument('--output', '-o', choices=sorted(_OUTPUT_ENCODERS),
+                         help='encoding of the result (default: {})'.format('text' if decrypt else 'base64'))
+        cbc.set_defaults(func=partial(_cbc_command, decrypt))
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, out: IO[str] = sys.stdout) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args, out)
+    except BrokenPipeError:
+        # the rest of the pipeline stopped reading
+        return 1
+    except (OSError, ValueError) as e:
+        print('error: {}'.format(e), file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,227 @@
+"""
+Byte level language models, to score how much some bytes look like plaintext.
+
+A model is compiled once into 256 slot lookup tables,
+so scoring a fragment costs one table lookup per byte
+(or per distinct byte, for the unigram part).
+"""
+import math
+import struct
+import sys
+from array import array
+from collections import Counter
+from string import printable
+
+from cryptopals.util import eng_freqs
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+PRINTABLE = frozenset(printable.encode())
+
+# Probability floors for bytes a model has never seen.
+# Anything that isn't printable is made heavily unlikely, so that
+# control characters and binary garbage sink to the bottom of a ranking.
+PRINTABLE_FLOOR = 1e-4
+NONPRINTABLE_FLOOR = 1e-9
+
+# Scores of all 256 single byte XOR keys are computed at once in fixed point,
+# with one lane per key packed into a big int (see cryptopals.s1).
+_FIXED_POINT = 1 << 16
+_LANE_BITS = 128
+_KEYS = [chr(k) for k in range(256)]
+
+# Bigram models rerank this many of the best unigram candidates.
+RERANK = 16
+
+_MAGIC = b'CPLM'
+_HEADER = struct.Struct('<4sBB?')
+_VERSION = 1
+_MODES = ('loglik', 'chi2')
+
+
+def _floored(probs: Sequence[float]) -> List[float]:
+    floored = [max(p, PRINTABLE_FLOOR if b in PRINTABLE else NONPRINTABLE_FLOOR)
+               for b, p in enumerate(probs)]
+    total = sum(floored)
+    return [p / total for p in floored]
+
+
+def _pack_rows(weights: Sequence[int]) -> List[int]:
+    # Row c holds weights[c ^ k] in lane k.
+    return [sum(weights[c ^ k] << (_LANE_BITS * k) for k in range(256))
+            for c in range(256)]
+
+
+class LanguageModel:
+    """
+    Unigram (and optionally bigram) byte probabilities, compiled into tables.
+
+    Scores are like english_score: lower is better.
+    In 'loglik' mode a score is the average negative log-likelihood per byte,
+    in 'chi2' mode it is the chi-squared statistic of the byte histogram
+    against the model, divided by the fragment length.
+    Bigrams only take part in 'loglik' mode.
+    """
+
+    def __init__(self, unigrams: Sequence[float], bigrams: Optional[Sequence[float]] = None,
+                 mode: str = 'loglik') -> None:
+        if mode not in _MODES:
+            raise ValueError('unknown mode: {}'.format(mode))
+        if len(unigrams) != 256:
+            raise ValueError('unigrams must have 256 entries')
+        if bigrams is not None and len(bigrams) != 256 * 256:
+            raise ValueError('bigrams must have 65536 entries')
+
+        self.mode: str = mode
+        self.probs: List[float] = list(unigrams)
+        self.log_probs: List[float] = [math.log(p) for p in self.probs]
+        # log P(b | a), indexed by (a << 8) | b
+        self.bigram_log_probs: Optional[array] = None
+        if bigrams is not None:
+            self.bigram_log_probs = array('d', (math.log(p) for p in bigrams))
+
+        if mode == 'loglik':
+            costs = [-lp for lp in self.log_probs]
+        else:
+            costs = [1 / p for p in self.probs]
+        self._rows: List[int] = _pack_rows([round(c * _FIXED_POINT) for c in costs])
+
+        # Halfway between the score of text in the model's own language
+        # and the score of uniformly random bytes.
+        if mode == 'loglik':
+            expected = -sum(p * lp for p, lp in zip(self.probs, self.log_probs))
+            noise = -sum(self.log_probs) / 256
+        else:
+            expected = 0.0
+            noise = sum((1 / 256 - p) ** 2 / p for p in self.probs)
+        self.threshold: float = (expected + noise) / 2
+
+    @classmethod
+    def from_frequencies(cls, freqs: Optional[Dict[str, float]] = None, mode: str = 'loglik') -> 'LanguageModel':
+        """
+        A unigram model from a table of character frequencies, like cryptopals.util.eng_freqs.
+        Letters are case insensitive, as in english_score.
+        """
+        freqs = eng_freqs if freqs is None else freqs
+        probs = [0.0] * 256
+        for char, freq in freqs.items():
+            for variant in {char.upper(), char.lower()}:
+                code = ord(variant)
+                if code < 256:
+                    probs[code] = freq
+        return cls(_floored(probs), mode=mode)
+
+    @classmethod
+    def train(cls, corpus: bytes, bigrams: bool = True, mode: str = 'loglik') -> 'LanguageModel':
+        """
+        Estimate a model from a sample of plaintext, such as tests/data/english_sample.txt.
+        """
+        counts = Counter(corpus)
+        total = max(len(corpus), 1)
+        unigrams = _floored([counts[b] / total for b in range(256)])
+
+        bigram_probs = None
+        if bigrams:
+            pairs = Counter((a << 8) | b for a, b in zip(corpus, corpus[1:]))
+            bigram_probs = []
+            for a in range(256):
+                following = sum(pairs[(a << 8) | b] for b in range(256))
+                row = [pairs[(a << 8) | b] / following if following else unigrams[b]
+                       for b in range(256)]
+                bigram_probs.extend(_floored(row))
+        return cls(unigrams, bigram_probs, mode)
+
+    def score(self, bs: Iterable[int]) -> float:
+        """
+        How unlike the model's language `bs` is. Lower is better.
+        """
+        bs = bytes(bs)
+        size = len(bs)
+        if not size:
+            return 0.0
+        counts = Counter(bs)
+        if self.mode == 'chi2':
+            return sum(n * n / self.probs[c] for c, n in counts.items()) / (size * size) - 1
+        if self.bigram_log_probs is None:
+            return -sum(n * self.log_probs[c] for c, n in counts.items()) / size
+        table = self.bigram_log_probs
+        likelihood = self.log_probs[bs[0]]
+        likelihood += sum(table[(a << 8) | b] for a, b in zip(bs, bs[1:]))
+        return -likelihood / size
+
+    def rank_keys(self, bs: Iterable[int], top: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Score all 256 single byte XOR keys for `bs` and return the `top` best
+        (key, score) pairs, best first.
+
+        The unigram part is computed from the byte histogram, which XORing with a key
+        only permutes. Bigram models rescore the best max(top, RERANK) unigram candidates
+        in full, and only return those.
+        """
+        bs = bytes(bs)
+        size = len(bs)
+        counts = Counter(bs)
+        if self.mode == 'chi2':
+            packed = sum(n * n * self._rows[c] for c, n in counts.items())
+        else:
+            packed = sum(n * self._rows[c] for c, n in counts.items())
+        lanes = packed.to_bytes(256 * _LANE_BITS // 8, 'little')
+        lane_bytes = _LANE_BITS // 8
+        totals = [int.from_bytes(lanes[i:i + lane_bytes], 'little')
+                  for i in range(0, len(lanes), lane_bytes)]
+        order = sorted(range(256), key=totals.__getitem__)
+
+        if self.bigram_log_probs is not None and self.mode == 'loglik':
+            shortlist = order[:max(top or 0, RERANK)]
+            scored = [(_KEYS[k], self.score(bs.translate(_xor_table(k)))) for k in shortlist]
+            scored.sort(key=lambda keyscore: keyscore[1])
+            return scored[:top]
+
+        if not size:
+            return [(_KEYS[k], 0.0) for k in order[:top]]
+        if self.mode == 'chi2':
+            return [(_KEYS[k], totals[k] / _FIXED_POINT / (size * size) - 1) for k in order[:top]]
+        return [(_KEYS[k], totals[k] / _FIXED_POINT / size) for k in order[:top]]
+
+    def save(self, path: str) -> None:
+        """
+        Write the model to a compact binary file.
+        """
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, _MODES.index(self.mode),
+                                 self.bigram_log_probs is not None))
+            tables = [array('d', self.probs)]
+            if self.bigram_log_probs is not None:
+                tables.append(array('f', (math.exp(lp) for lp in self.bigram_log_probs)))
+            for table in tables:
+                # files are always little endian
+                if sys.byteorder == 'big':
+                    table.byteswap()
+                f.write(table.tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'LanguageModel':
+        with open(path, 'rb') as f:
+            magic, version, mode, has_bigrams = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError('not a language model file: {}'.format(path))
+            unigrams = array('d')
+            unigrams.frombytes(f.read(256 * unigrams.itemsize))
+            bigrams = None
+            if has_bigrams:
+                bigrams = array('f')
+                bigrams.frombytes(f.read(256 * 256 * bigrams.itemsize))
+        if sys.byteorder == 'big':
+            unigrams.byteswap()
+            if bigrams is not None:
+                bigrams.byteswap()
+        return cls(unigrams, bigrams, _MODES[mode])
+
+
+_XOR_TABLES: Dict[int, bytes] = {}
+
+def _xor_table(key: int) -> bytes:
+    # A bytes.translate table that XORs every byte with key.
+    if key not in _XOR_TABLES:
+        _XOR_TABLES[key] = bytes(c ^ key for c in range(256))
+    return _XOR_TABLES[key]
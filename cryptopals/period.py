@@ -0,0 +1,108 @@
+"""
+Period detection on bytes: exact periods of a whole buffer, and approximate
+periods for noisy data, such as repeating-key XOR ciphertext.
+
+A shift p is an approximate period when most bytes equal the byte p further on.
+XORing a repeating-key ciphertext with itself shifted by a multiple of the keysize
+cancels the key out, so those shifts match as often as the plaintext does with itself,
+far more than any other shift.
+"""
+from statistics import median
+
+from cryptopals.s1 import fixed_len_xor
+
+from typing import List, Optional, Tuple, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def shortest_period(bs: Union[str, BytesLike]) -> int:
+    """
+    The length of the shortest piece that `bs` is a whole number of repetitions of
+    (len(bs) itself if there is none).
+
+    `bs` is a rotation of itself by p exactly when p is such a period, so the first
+    match of `bs` in `bs + bs` after position 0 is the shortest one.
+    That's a single linear time search, in C.
+    """
+    if isinstance(bs, memoryview):
+        bs = bs.tobytes()
+    if not bs:
+        return 0
+    return (bs + bs).find(bs, 1)
+
+
+def periods(bs: Union[str, BytesLike]) -> List[int]:
+    """
+    All the lengths of pieces that `bs` is a whole number of repetitions of, shortest first.
+    These are the multiples of the shortest one that divide len(bs).
+    """
+    shortest = shortest_period(bs)
+    if not shortest:
+        return []
+    return [p for p in range(shortest, len(bs) + 1, shortest) if len(bs) % p == 0]
+
+
+def match_rate(bs: BytesLike, shift: int) -> float:
+    """
+    The fraction of bytes of `bs` equal to the byte `shift` positions further on.
+    """
+    compared = len(bs) - shift
+    if compared <= 0:
+        return 0.0
+    # equal bytes XOR to zero
+    return fixed_len_xor(bs, memoryview(bs)[shift:]).count(0) / compared
+
+
+def match_rates(bs: BytesLike, low: int = 1, high: Optional[int] = None) -> List[Tuple[int, float]]:
+    """
+    (shift, match_rate) for every shift in range(low, high).
+    Each shift is one pass over `bs`. `high` defaults to len(bs).
+    """
+    if high is None:
+        high = len(bs)
+    return [(shift, match_rate(bs, shift)) for shift in range(low, high)]
+
+
+def approximate_periods(bs: BytesLike, tolerance: float = 0.0, low: int = 1,
+                        high: Optional[int] = None) -> List[int]:
+    """
+    The shifts in range(low, high) at which at most a `tolerance` fraction of bytes
+    differ, smallest first. With no tolerance, these are the exact periods:
+    bs[i] == bs[i + p] for every i, whether or not p divides len(bs).
+    """
+    return [shift for shift, rate in match_rates(bs, low, high) if 1 - rate <= tolerance]
+
+
+def keysize_hints(bs: BytesLike, low: int = 2, high: int = 40,
+                  top: Optional[int] = None) -> List[Tuple[int, float]]:
+    """
+    S1C6 - Break repeating-key XOR
+    https://cryptopals.com/sets/1/challenges/6
+
+    Rank the keysizes in range(low, high), best first, as (keysize, score) pairs
+    like rank_keysizes does, from the periodicity of the ciphertext.
+
+    Shifts that match markedly more often than the rest (above the midpoint between
+    the best and the median match rate) are taken to be multiples of the keysize.
+    A keysize scores one for each of its multiples that is such a shift, and loses
+    one for each that isn't. Lower scores are better, so they are negated.
+    Only keysizes with at least one periodic multiple are returned.
+    """
+    # We know that keysize must be capped to have at least two comparable blocks.
+    high = min(high, len(bs) // 2 + 1)
+    rates = match_rates(bs, 1, high)
+    if not rates:
+        return []
+    values = [rate for _, rate in rates]
+    cutoff = (max(values) + median(values)) / 2
+    periodic = {shift for shift, rate in rates if rate >= cutoff}
+
+    scores = []
+    for keysize in range(low, high):
+        multiples = range(keysize, high, keysize)
+        hits = sum(multiple in periodic for multiple in multiples)
+        if hits:
+            scores.append((keysize, float(len(multiples) - 2 * hits)))
+    scores.sort(key=lambda keyscore: keyscore[1])
+    return scores[:top]
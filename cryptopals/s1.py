@@ -17,19 +17,32 @@ At least two of them (we won't say which) are important stepping stones to later
 """
 
 import base64
+import binascii
+import math
+import mmap
+import os
+import sys
+from array import array
 from collections import Counter
-from itertools import repeat, cycle, zip_longest, combinations
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from heapq import heappush, heapreplace
+from itertools import combinations
 from string import printable
 from statistics import mean
 from operator import itemgetter
 
+from cryptopals.language import LanguageModel
 from cryptopals.util import eng_freqs
 
-from typing import Iterator, List, Tuple, Union, Sequence, Iterable
+from typing import Iterator, List, Tuple, Union, Sequence, Iterable, Callable, Dict, BinaryIO
 from typing import TypeVar, Optional, Iterator
 
 T = TypeVar('T')
 
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
 def hex_to_b64_bytes(given: str) -> bytes:
     """
     S1C1 - Convert hex to base64
@@ -37,22 +50,43 @@ def hex_to_b64_bytes(given: str) -> bytes:
     """
     return base64.b64encode(bytes.fromhex(given))
 
-def fixed_len_xor(bs1: bytes, bs2: bytes) -> bytes:
+def _as_bytes(buf: Buffer) -> Buffer:
+    # int.from_bytes wants a flat view of unsigned bytes.
+    if isinstance(buf, memoryview) and buf.format != 'B':
+        return buf.cast('B')
+    return buf
+
+def _bulk_xor(bs1: Buffer, bs2: Buffer) -> bytes:
+    """
+    XOR two buffers as a pair of big integers, so the work happens
+    in C over machine words instead of one Python int per byte.
+    """
+    bs1, bs2 = _as_bytes(bs1), _as_bytes(bs2)
+    size = min(len(bs1), len(bs2))
+    a = int.from_bytes(bs1[:size], 'big')
+    b = int.from_bytes(bs2[:size], 'big')
+    return (a ^ b).to_bytes(size, 'big')
+
+def fixed_len_xor(bs1: Iterable[int], bs2: Iterable[int]) -> bytes:
     """
     S1C2 - Fixed XOR
     https://cryptopals.com/sets/1/challenges/2
 
     Write a function that takes two equal-length buffers and produces their XOR combination.
+
+    Like zip, the output is as long as the shortest input.
+    Buffers take the bulk path, any other iterable of ints is XOR'd byte by byte.
     """
+    if isinstance(bs1, BUFFER_TYPES) and isinstance(bs2, BUFFER_TYPES):
+        return _bulk_xor(bs1, bs2)
     return bytes(a ^ b for a, b in zip(bs1, bs2))
 
-def single_char_xor(bs: bytes, c: str) -> bytes:
+def single_char_xor(bs: Buffer, c: str) -> bytes:
     """
     S1C3 - Single-byte XOR cipher
     https://cryptopals.com/sets/1/challenges/3
     """
-    rep = repeat(ord(c))
-    return fixed_len_xor(bs, rep)
+    return fixed_len_xor(bs, bytes([ord(c)]) * len(bs))
 
 def english_score(fragment: bytes, denominator: Optional[int] = None) -> float:
     """
@@ -70,7 +104,57 @@ def english_score(fragment: bytes, denominator: Optional[int] = None) -> float:
              for k in eng_freqs}
     return sum(diffs.values())
 
-def break_single_char_xor(bs: bytes) -> Tuple[str, float]:
+# english_score only looks at how many bytes land on a letter (or space),
+# so it is linear in the byte histogram of its input.
+_ENG_WEIGHTS = [1 if bytes([b]).upper().decode('latin-1') in eng_freqs else 0
+                for b in range(256)]
+_ENG_TOTAL = sum(eng_freqs.values())
+
+# The 256x256 key/byte weight table, one row per ciphertext byte c.
+# Row c packs weight(c ^ k) for every key k into a 64 bit lane of a big int,
+# so scoring all keys is one small multiply-add per distinct ciphertext byte.
+_LANE_BITS = 64
+_XOR_WEIGHT_ROWS = [sum(_ENG_WEIGHTS[c ^ k] << (_LANE_BITS * k) for k in range(256))
+                    for c in range(256)]
+
+_KEYS = [chr(k) for k in range(256)]
+
+def _xor_key_hits(bs: Iterable[int]) -> Tuple[Sequence[int], int]:
+    """
+    For every key k, how many bytes of `bs` XOR k land on a letter,
+    along with the length of `bs`.
+    """
+    counts = Counter(bs)
+    packed = sum(n * _XOR_WEIGHT_ROWS[c] for c, n in counts.items())
+    lanes = array('Q', packed.to_bytes(256 * _LANE_BITS // 8, 'little'))
+    if sys.byteorder == 'big':
+        lanes.byteswap()
+    return lanes, sum(counts.values())
+
+def _hits_to_score(hits: int, size: int) -> float:
+    return _ENG_TOTAL - 100 * hits / size if size else _ENG_TOTAL
+
+def rank_single_char_xor(bs: Iterable[int], top: Optional[int] = None,
+                         model: Optional[LanguageModel] = None) -> List[Tuple[str, float]]:
+    """
+    S1C3 - Break single-byte XOR cipher
+    https://cryptopals.com/sets/1/challenges/3
+
+    Score all 256 single byte keys at once and return the `top` best (key, score) pairs,
+    best first, with the same scores english_score gives the deciphered text.
+
+    XORing with a key just permutes the byte histogram of the ciphertext,
+    so a single histogram is enough to score every key.
+
+    Pass a `model` to score with a LanguageModel instead.
+    """
+    if model is not None:
+        return model.rank_keys(bs, top)
+    hits, size = _xor_key_hits(bs)
+    order = sorted(range(256), key=hits.__getitem__, reverse=True)
+    return [(_KEYS[k], _hits_to_score(hits[k], size)) for k in order[:top]]
+
+def break_single_char_xor(bs: Iterable[int], model: Optional[LanguageModel] = None) -> Tuple[str, float]:
     """
     S1C3 - Break single-byte XOR cipher
     https://cryptopals.com/sets/1/challenges/3
@@ -78,24 +162,87 @@ def break_single_char_xor(bs: bytes) -> Tuple[str, float]:
     Evaluate each output [of the english scoring function]
     and choose the one with the best score.
     """
+    if model is not None:
+        ranked = rank_single_char_xor(bs, model=model)
+        return next(((c, score) for c, score in ranked if c in printable), ('', float('inf')))
+
     inc, inc_score = '', 100.0
 
+    scores = dict(rank_single_char_xor(bs))
     for c in printable:
-        xord = single_char_xor(bs, c)
-        candidate_score = english_score(xord)
+        candidate_score = scores[c]
         if candidate_score < inc_score:
             inc, inc_score = c, candidate_score
     return inc, inc_score
 
-def repeating_key_xor(bs: bytes, key: str) -> bytes:
+LINE_DECODERS: Dict[str, Callable[[bytes], bytes]] = {
+    'hex': lambda line: binascii.unhexlify(line.strip()),
+    'base64': lambda line: base64.b64decode(line.strip()),
+    'raw': lambda line: line.rstrip(b'\r\n'),
+}
+
+def detect_single_char_xor(lines: Union[str, Iterable[bytes]], encoding: str = 'hex',
+                           top: int = 1, model: Optional[LanguageModel] = None,
+                           on_error: Optional[Callable[[int, ValueError], None]] = None
+                           ) -> List[Tuple[str, float, int, bytes]]:
+    """
+    S1C4 - Detect single-character XOR
+    https://cryptopals.com/sets/1/challenges/4
+
+    One of the 60-character strings in this file has been encrypted by single-character XOR. Find it.
+
+    `lines` is a path or any iterable of encoded lines. They are decoded one at a time
+    and every (line, key) pair is scored, but only the `top` best
+    (key, score, line number, ciphertext) candidates are kept, best first,
+    so memory does not grow with the input.
+
+    A line that doesn't decode raises ValueError, unless there is an `on_error`:
+    then it is called with the line number and the error, and the line skipped.
+    """
+    if top < 1:
+        raise ValueError('top must be at least 1')
+    if isinstance(lines, str):
+        with open(lines, 'rb') as f:
+            return detect_single_char_xor(f, encoding, top, model, on_error)
+
+    decode = LINE_DECODERS[encoding]
+    # A heap of the candidates kept so far, with the worst one at the root.
+    best: List[Tuple[float, int, str, bytes]] = []
+    for lineno, line in enumerate(lines):
+        try:
+            bs = decode(line)
+        except ValueError as e:
+            if on_error is None:
+                raise
+            on_error(lineno, e)
+            continue
+        if model is None:
+            hits, size = _xor_key_hits(bs)
+            if len(best) == top and -_hits_to_score(max(hits), size) < best[0][0]:
+                continue
+        for key, score in rank_single_char_xor(bs, top, model):
+            candidate = (-score, -lineno, key, bs)
+            if len(best) < top:
+                heappush(best, candidate)
+            elif candidate > best[0]:
+                heapreplace(best, candidate)
+            else:
+                # the ranking is sorted, the rest of this line can't do better
+                break
+    return [(key, -score, -lineno, bs) for score, lineno, key, bs in sorted(best, reverse=True)]
+
+def repeating_key_xor(bs: Buffer, key: str) -> bytes:
     """
     S1C5 - Implement repeating-key XOR
     https://cryptopals.com/sets/1/challenges/5
 
     In repeating-key XOR, you'll sequentially apply each byte of the key
     """
-    cyc = cycle((ord(c) for c in key))
-    return fixed_len_xor(bs, cyc)
+    key_bytes = bytes(ord(c) for c in key)
+    if not key_bytes:
+        return b''
+    reps = -(-len(bs) // len(key_bytes))
+    return fixed_len_xor(bs, key_bytes * reps)
 
 def hamming_dist(bs1: bytes, bs2: bytes) -> int:
     """
@@ -107,31 +254,153 @@ def hamming_dist(bs1: bytes, bs2: bytes) -> int:
 
     This can be solved by XORing both strings, and adding up the bits.
     """
-    return sum(bin(v).count("1") for v in fixed_len_xor(bs1, bs2))
+    return _popcount(int.from_bytes(fixed_len_xor(bs1, bs2), 'big'))
+
+def _bin_popcount(n: int) -> int:
+    return bin(n).count('1')
 
-def break_repeating_key_xor(bs: bytes, low: int = 2, high: int = 100) -> str:
+# int.bit_count is only there from python 3.10 on
+_popcount: Callable[[int], int] = getattr(int, 'bit_count', _bin_popcount)
+
+def hamming_matrix(blocks: Sequence[Buffer]) -> List[List[int]]:
+    """
+    Pairwise Hamming distances between all `blocks`, as a symmetric matrix.
+
+    Each block is read into an integer once, so every pair costs a single
+    XOR and popcount. As with hamming_dist, blocks of different lengths are
+    compared over their shortest common prefix.
+    """
+    sizes = [len(_as_bytes(b)) for b in blocks]
+    ints = [int.from_bytes(_as_bytes(b), 'big') for b in blocks]
+    dist = [[0] * len(blocks) for _ in blocks]
+    for i, j in combinations(range(len(blocks)), 2):
+        a, b = ints[i], ints[j]
+        # Drop the trailing bytes of the longer block.
+        if sizes[i] > sizes[j]:
+            a >>= 8 * (sizes[i] - sizes[j])
+        elif sizes[j] > sizes[i]:
+            b >>= 8 * (sizes[j] - sizes[i])
+        dist[i][j] = dist[j][i] = _popcount(a ^ b)
+    return dist
+
+# english_score of english prose sits under this, random bytes well above it.
+# Text cracked at a wrong keysize that shares key bytes with the right one lands
+# in between, as can less typical english: then every candidate is tried.
+ENGLISH_THRESHOLD = 8.0
+
+def break_repeating_key_xor(bs: bytes, low: int = 2, high: int = 100,
+                            workers: Optional[int] = None, executor: Optional[Executor] = None,
+                            method: str = 'hamming', candidates: int = 3,
+                            threshold: Optional[float] = None,
+                            model: Optional[LanguageModel] = None) -> str:
     """
     S1C6 - Break repeating-key XOR
     https://cryptopals.com/sets/1/challenges/6
+
+    The best `candidates` keysizes (ranked with `method`, see rank_keysizes) are
+    tried in order, stopping at the first one whose plaintext score beats `threshold`.
+    If none does, so are the best keysizes of the other ranking methods,
+    and otherwise the best scoring key among them all is returned.
+    A key that mostly repeats itself may have been cracked at a multiple of the
+    keysize: it is cracked again at the period it repeats with, if a key of that
+    period deciphers text it wasn't cracked on better.
+
+    Plaintexts are scored with english_score, or with `model` if one is given.
+    `threshold` defaults to ENGLISH_THRESHOLD, or to the model's own threshold.
+
+    Pass `workers` (or an existing `executor`) to rank keysizes and crack columns
+    on a process pool. The key is the same one the serial path finds.
     """
+    if workers and executor is None:
+        with ProcessPoolExecutor(workers) as pool:
+            return break_repeating_key_xor(bs, low, high, executor=pool, method=method,
+                                           candidates=candidates, threshold=threshold, model=model)
+
+    if threshold is None:
+        threshold = ENGLISH_THRESHOLD if model is None else model.threshold
+    score_plaintext = english_score if model is None else model.score
 
     # Let KEYSIZE be the guessed length of the key; try values from 2 to (say) 40.
-    keysize = brute_force_keysize_search(bs, low, high)
+    # You could proceed perhaps with the smallest 2-3 KEYSIZE values.
+    inc, inc_score = '', float('inf')
+    # Each scorer is blind to some keys (say, key bytes a bit apart for 'hamming'):
+    # if none of the candidates of `method` deciphers convincingly, try the others'.
+    methods = [method] + [other for other in KEYSIZE_SCORERS if other != method]
+    for ranking in methods:
+        for keysize, _ in rank_keysizes(bs, low, high, top=candidates, method=ranking, executor=executor):
+            key = _break_keysize(bs, keysize, executor, model)
+            # Maybe a multiple of the keysize came first: crack again with longer columns.
+            period = _shorter_period(bs, key, low, score_plaintext, executor, model)
+            while period is not None:
+                key = _break_keysize(bs, period, executor, model)
+                period = _shorter_period(bs, key, low, score_plaintext, executor, model)
+            score = score_plaintext(repeating_key_xor(bs, key))
+            if score < inc_score:
+                inc, inc_score = key, score
+            if score < threshold:
+                return inc
+    return inc
+
+def _shorter_period(bs: bytes, key: str, low: int, score_plaintext: Callable[[bytes], float],
+                    executor: Optional[Executor] = None,
+                    model: Optional[LanguageModel] = None) -> Optional[int]:
+    # The longest period `key` (mostly) repeats with that holds up, if any.
+    return next((period for period in _key_periods(key, low)
+                 if _period_generalizes(bs, len(key), period, score_plaintext, executor, model)), None)
+
+def _key_periods(key: str, low: int = 1) -> List[int]:
+    """
+    The keysizes from `low` up that repeat at least half of `key`, longest first.
 
-    # Now that you probably know the KEYSIZE: break the ciphertext into blocks of KEYSIZE length.
-    blocks = chunks(bs, keysize)
+    A key cracked at a multiple of the real keysize repeats itself, but for the
+    bytes of columns too short to crack. Real keys can partly repeat too (say 'abac'),
+    so these are only candidates, see _period_generalizes.
+    """
+    periods = []
+    for period in range(len(key) - 1, max(low, 1) - 1, -1):
+        if len(key) % period == 0:
+            matches = sum(a == b for a, b in zip(key, key[period:]))
+            if 2 * matches >= len(key) - period:
+                periods.append(period)
+    return periods
+
+def _period_generalizes(bs: bytes, keysize: int, period: int,
+                        score_plaintext: Callable[[bytes], float],
+                        executor: Optional[Executor] = None,
+                        model: Optional[LanguageModel] = None) -> bool:
+    """
+    Whether a key cracked at `period` (a divisor of `keysize`) deciphers text it
+    wasn't cracked on better than one cracked at `keysize`.
 
+    On the text they are cracked on, the longer key always scores better: each of
+    its columns is fitted on its own. So the blocks of `keysize` are split in
+    two halves, keys are cracked on one and scored on the other, and back.
+    A tie goes to the shorter key.
+    """
+    blocks = list(chunks(bs, keysize))
+    halves = b''.join(blocks[::2]), b''.join(blocks[1::2])
+    longer = shorter = 0.0
+    for train, test in (halves, halves[::-1]):
+        longer += score_plaintext(repeating_key_xor(test, _break_keysize(train, keysize, executor, model)))
+        shorter += score_plaintext(repeating_key_xor(test, _break_keysize(train, period, executor, model)))
+    # the same plaintext summed in another order can differ in the last bits
+    return shorter < longer or math.isclose(shorter, longer)
+
+def _break_keysize(bs: bytes, keysize: int, executor: Optional[Executor] = None,
+                   model: Optional[LanguageModel] = None) -> str:
+    # Now that you probably know the KEYSIZE: break the ciphertext into blocks of KEYSIZE length.
     # Now transpose the blocks:
     # make a block that is the first byte of every block,
     # and a block that is the second byte of every block, and so on.
-    trans = zip_longest(*blocks)
-    clean_trans: Iterator[List[bytes]]
-    clean_trans= ([char for char in block if char is not None] for block in trans)
+    trans = transpose(bs, keysize)
 
     # Solve each block as if it was single-character XOR.
     # For each block, the single-byte XOR key that produces the best looking
     # histogram is the repeating-key XOR key byte for that block.
-    single_keys = (break_single_char_xor(block) for block in clean_trans)
+    if executor is not None:
+        # views can't be pickled, workers get a copy of their column
+        trans = [bytes(column) for column in trans]
+    single_keys = _map(partial(break_single_char_xor, model=model), trans, executor)
 
     # Put them together and you have the key.
     return ''.join(keyscore[0] for keyscore in single_keys)
@@ -139,8 +408,35 @@ def break_repeating_key_xor(bs: bytes, low: int = 2, high: int = 100) -> str:
 def chunks(c: Sequence[T], size: int) -> Iterator[Sequence[T]]:
     yield from (c[i:i + size] for i in range(0, len(c), size))
 
+def transpose(bs: Buffer, size: int) -> List[memoryview]:
+    """
+    The columns of `bs` cut into blocks of `size`: the first byte of every block,
+    the second byte of every block, and so on.
 
-def brute_force_keysize_search(bs: bytes, low: int, high: int, num_blocks: int = 5) -> int:
+    Columns are strided views into `bs` (bytes, bytearray, memoryview, mmap...),
+    nothing is copied.
+    """
+    view = _as_bytes(memoryview(bs))
+    return [view[i::size] for i in range(min(size, len(view)))]
+
+def _map(func: Callable, iterable: Iterable, executor: Optional[Executor] = None) -> Iterator:
+    # Results always come back in input order, pool or not.
+    if executor is None:
+        return map(func, iterable)
+    return executor.map(func, iterable)
+
+def _keysize_distance(bs: bytes, num_blocks: int, keysize: int) -> float:
+    genchunks = chunks(bs, keysize)
+    blocks = [next(genchunks) for _ in range(num_blocks)]
+    dist = hamming_matrix(blocks)
+    block_pairs = combinations(range(num_blocks), 2)
+    norm_distances = [dist[i][j] / keysize for i, j in block_pairs]
+    avg_norm_distance = mean(norm_distances)
+    return avg_norm_distance / keysize
+
+def brute_force_keysize_search(bs: bytes, low: int, high: int, num_blocks: int = 5,
+                               workers: Optional[int] = None, executor: Optional[Executor] = None,
+                               keysizes: Optional[Iterable[int]] = None) -> int:
     """
     S1C6 - Break repeating-key XOR
     https://cryptopals.com/sets/1/challenges/6
@@ -152,21 +448,121 @@ def brute_force_keysize_search(bs: bytes, low: int, high: int, num_blocks: int =
     The KEYSIZE with the smallest normalized edit distance is probably the key.
     You could proceed perhaps with the smallest 2-3 KEYSIZE values.
     Or take 4 KEYSIZE blocks instead of 2 and average the distances.
+
+    Only the `keysizes` in range(low, high) are tried if given,
+    say from cryptopals.period.keysize_hints.
     """
+    if workers and executor is None:
+        with ProcessPoolExecutor(workers) as pool:
+            return brute_force_keysize_search(bs, low, high, num_blocks, executor=pool, keysizes=keysizes)
 
     # We know that keysize must be capped to have at least two comparable blocks.
     high = min(high, len(bs) // 2)
-    key_size_scores = []
-
-    for keysize in range(low, high):
-        genchunks = chunks(bs, keysize)
-        blocks = (next(genchunks) for _ in range(num_blocks))
-        block_pairs = combinations(blocks, 2)
-        norm_distances = [hamming_dist(b1, b2) / keysize for b1, b2 in block_pairs]
-        avg_norm_distance = mean(norm_distances)
-        key_size_scores.append((keysize, avg_norm_distance / keysize))
+    keysizes = _keysizes_in(keysizes, low, high)
+
+    # Only the leading blocks are compared, don't ship the rest to the workers.
+    head = bs[:num_blocks * (high - 1)]
+    distances = _map(partial(_keysize_distance, head, num_blocks), keysizes, executor)
+    key_size_scores = list(zip(keysizes, distances))
     return min(key_size_scores, key=itemgetter(1))[0]
 
+def _keysizes_in(keysizes: Optional[Iterable[int]], low: int, high: int) -> Sequence[int]:
+    if keysizes is None:
+        return range(low, high)
+    return [keysize for keysize in keysizes if low <= keysize < high]
+
+def _hamming_keysize_score(bs: bytes, keysize: int) -> float:
+    """
+    Average Hamming distance per byte between every block and the next one.
+
+    XORing the ciphertext with itself shifted by `keysize` lines every byte up
+    with the byte one block later, so all blocks are compared in a single pass.
+    """
+    compared = len(bs) - keysize
+    return hamming_dist(bs, memoryview(bs)[keysize:]) / compared
+
+def _coincidence_keysize_score(bs: bytes, keysize: int) -> float:
+    """
+    Negated index of coincidence, averaged over the columns of a `keysize` transposition.
+
+    Every column of the right keysize is XOR'd with a single byte,
+    so it keeps the (high) index of coincidence of english text.
+    """
+    total = 0.0
+    for column in transpose(bs, keysize):
+        pairs = len(column) * (len(column) - 1)
+        if pairs:
+            total += sum(n * (n - 1) for n in Counter(column).values()) / pairs
+    return -total / keysize
+
+KEYSIZE_SCORERS: Dict[str, Callable[[bytes, int], float]] = {
+    'hamming': _hamming_keysize_score,
+    'ic': _coincidence_keysize_score,
+}
+
+def _score_keysizes(scorer: Callable[[bytes, int], float], bs: bytes, keysizes: Sequence[int]) -> List[float]:
+    # The part of rank_keysizes that runs in the workers.
+    return [scorer(bs, keysize) for keysize in keysizes]
+
+# The fewest blocks rank_keysizes will split the ciphertext into.
+KEYSIZE_MIN_BLOCKS = 8
+
+def rank_keysizes(bs: bytes, low: int = 2, high: int = 40, top: Optional[int] = None,
+                  method: str = 'hamming', keysizes: Optional[Iterable[int]] = None,
+                  workers: Optional[int] = None, executor: Optional[Executor] = None) -> List[Tuple[int, float]]:
+    """
+    S1C6 - Break repeating-key XOR
+    https://cryptopals.com/sets/1/challenges/6
+
+    Rank the keysizes in range(low, high), best first, as (keysize, score) pairs.
+    Lower scores are better.
+
+    Unlike brute_force_keysize_search, every block of the ciphertext is used:
+    'hamming' averages the normalized edit distance between all consecutive blocks,
+    'ic' averages the index of coincidence of the transposed columns.
+    As with brute_force_keysize_search, only `keysizes` are ranked if given,
+    and `workers` (or an existing `executor`) score them on a process pool.
+
+    Every multiple of the keysize lines the key up just as well, and on short
+    ciphertexts noise decides which of them scores best. So the score of a keysize
+    is how much better its multiples do than the other keysizes, on average.
+    The real keysize gets that right: its divisors have bad multiples too,
+    and its multiples leave good keysizes out.
+    Keysizes are capped so that there are at least KEYSIZE_MIN_BLOCKS blocks.
+    """
+    if workers and executor is None:
+        with ProcessPoolExecutor(workers) as pool:
+            return rank_keysizes(bs, low, high, top, method, keysizes, executor=pool)
+
+    scorer = KEYSIZE_SCORERS[method]
+    # Columns of a handful of bytes score as noise: cap the keysize so that
+    # every column has at least KEYSIZE_MIN_BLOCKS bytes.
+    high = min(high, len(bs) // KEYSIZE_MIN_BLOCKS + 1)
+    keysizes = _keysizes_in(keysizes, low, high)
+    if executor is None:
+        scores = {keysize: scorer(bs, keysize) for keysize in keysizes}
+    else:
+        # Every task gets its own copy of the ciphertext: send one batch of
+        # keysizes per worker, not one keysize per task.
+        step = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+        batches = [batch for batch in (keysizes[i::step] for i in range(step)) if batch]
+        scored = executor.map(partial(_score_keysizes, scorer, bytes(bs)), batches)
+        batch_scores = {keysize: score for batch, scores_ in zip(batches, scored)
+                        for keysize, score in zip(batch, scores_)}
+        scores = {keysize: batch_scores[keysize] for keysize in keysizes}
+    if not scores:
+        return []
+
+    contrast = [(keysize, _multiples_contrast(scores, keysize)) for keysize in scores]
+    contrast.sort(key=itemgetter(1))
+    return contrast[:top]
+
+def _multiples_contrast(scores: Dict[int, float], keysize: int) -> float:
+    # The mean score of the multiples of keysize, less the mean score of the others.
+    multiples = [score for other, score in scores.items() if other % keysize == 0]
+    others = [score for other, score in scores.items() if other % keysize]
+    return mean(multiples) - mean(others) if others else scores[keysize]
+
 def detect_ecb(bs: bytes, blocksize: int = 16) -> bool:
     """
     S1C6 - Detect AES in ECB mode
@@ -178,5 +574,85 @@ def detect_ecb(bs: bytes, blocksize: int = 16) -> bool:
     This means we can detect if ecb is applied by checking whether we see the same
     block more than once in the input.
     """
-    blocks = list(chunks(bs, blocksize))
-    return len(blocks) > len(set(blocks))
+    return detect_ecb_stream(bs, blocksize)
+
+def _aligned_chunks(source: Union[Buffer, BinaryIO], blocksize: int, chunk_size: int) -> Iterator[Buffer]:
+    # Chunks of a buffer or binary file, each a whole number of blocks
+    # (but for the last one).
+    chunk_size = max(chunk_size - chunk_size % blocksize, blocksize)
+    if isinstance(source, BUFFER_TYPES):
+        view = _as_bytes(memoryview(source))
+        yield from chunks(view, chunk_size)
+        return
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    while True:
+        size = source.readinto(buf)
+        if not size:
+            return
+        # top up short reads so blocks stay aligned
+        while size % blocksize:
+            more = source.readinto(view[size:])
+            if not more:
+                break
+            size += more
+        yield view[:size]
+
+def _block_ints(chunk: Buffer, blocksize: int) -> List[int]:
+    # Only full blocks: a trailing partial block can't repeat anything.
+    # Slicing bytes is much cheaper than slicing a memoryview, so copy the chunk once.
+    chunk = bytes(chunk)
+    from_bytes = int.from_bytes
+    return [from_bytes(chunk[i:i + blocksize], 'big')
+            for i in range(0, len(chunk) - blocksize + 1, blocksize)]
+
+def detect_ecb_stream(source: Union[Buffer, BinaryIO], blocksize: int = 16,
+                      chunk_size: int = 1 << 20) -> bool:
+    """
+    S1C8 - Detect AES in ECB mode
+    https://cryptopals.com/sets/1/challenges/8
+
+    detect_ecb over a buffer (an mmap works) or a binary file, read `chunk_size` at a time.
+    Blocks seen so far are kept as integers in a set, and the scan stops
+    at the first chunk holding a repeat, so nothing is read past it.
+    """
+    seen: set = set()
+    for chunk in _aligned_chunks(source, blocksize, chunk_size):
+        blocks = _block_ints(chunk, blocksize)
+        before = len(seen)
+        seen.update(blocks)
+        if len(seen) - before < len(blocks):
+            return True
+    return False
+
+def ecb_repetitions(bs: Buffer, blocksize: int = 16) -> Tuple[int, int]:
+    """
+    How many blocks of `bs` repeat an earlier block, and how many full blocks there are.
+    """
+    blocks = _block_ints(_as_bytes(memoryview(bs)), blocksize)
+    return len(blocks) - len(set(blocks)), len(blocks)
+
+def rank_ecb(lines: Union[str, Iterable[bytes]], encoding: str = 'hex', blocksize: int = 16,
+             top: Optional[int] = None) -> List[Tuple[int, int, float]]:
+    """
+    S1C8 - Detect AES in ECB mode
+    https://cryptopals.com/sets/1/challenges/8
+
+    In this file are a bunch of hex-encoded ciphertexts.
+    One of them has been encrypted with ECB.
+
+    Score every record of `lines` (a path or an iterable of encoded lines, see
+    detect_single_char_xor) by the fraction of its blocks that are repeats.
+    Returns (line number, repeated blocks, score) for the `top` records, most ECB-like first.
+    """
+    if isinstance(lines, str):
+        with open(lines, 'rb') as f:
+            return rank_ecb(f, encoding, blocksize, top)
+
+    decode = LINE_DECODERS[encoding]
+    scores = []
+    for lineno, line in enumerate(lines):
+        repeats, total = ecb_repetitions(decode(line), blocksize)
+        scores.append((lineno, repeats, repeats / total if total else 0.0))
+    scores.sort(key=itemgetter(2), reverse=True)
+    return scores[:top]
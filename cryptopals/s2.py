@@ -12,16 +12,117 @@ Three of the challenges in this set are extremely valuable in breaking real-worl
 one allows you to decrypt messages encrypted in the default mode of AES,
 and the other two allow you to rewrite messages encrypted in the most popular modes of AES.
 """
+import hmac
+import math
 import os
 import random
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache, partial
+from importlib import import_module
 from itertools import count
 from string import printable
 
-from Crypto.Cipher import AES
+from cryptopals.language import LanguageModel
+from cryptopals.s1 import fixed_len_xor, chunks, detect_ecb, ecb_repetitions
 
-from cryptopals.s1 import fixed_len_xor, chunks, detect_ecb
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
-from typing import Optional, Tuple
+AES_BLOCK_SIZE = 16
+
+# AES backends, by preference. Each one is a factory taking a key and returning an
+# ECB cipher object, whose encrypt() and decrypt() take any number of whole blocks.
+# Libraries are only imported when a cipher is first needed.
+def _pycryptodome(key: bytes):
+    # pycryptodome, or the original pycrypto: they share the Crypto.Cipher API
+    from Crypto.Cipher import AES
+    return AES.new(key, AES.MODE_ECB)
+
+class _CryptographyCipher:
+    def __init__(self, key: bytes) -> None:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        self._cipher = Cipher(algorithms.AES(key), modes.ECB())
+
+    def encrypt(self, bs: bytes) -> bytes:
+        encryptor = self._cipher.encryptor()
+        return encryptor.update(bytes(bs)) + encryptor.finalize()
+
+    def decrypt(self, bs: bytes) -> bytes:
+        decryptor = self._cipher.decryptor()
+        return decryptor.update(bytes(bs)) + decryptor.finalize()
+
+def _python(key: bytes):
+    from cryptopals.aes import AES
+    return AES(key)
+
+CIPHER_BACKENDS: Dict[str, Callable[[bytes], object]] = OrderedDict([
+    ('pycryptodome', _pycryptodome),
+    ('cryptography', _CryptographyCipher),
+    ('python', _python),
+])
+
+_BACKEND_MODULES = {'pycryptodome': 'Crypto.Cipher.AES', 'cryptography': 'cryptography.hazmat.primitives.ciphers'}
+
+# None picks the first available backend; set_backend() or the
+# CRYPTOPALS_AES_BACKEND environment variable choose one.
+_backend: Optional[str] = os.environ.get('CRYPTOPALS_AES_BACKEND') or None
+
+def available_backends() -> List[str]:
+    """
+    Names of the AES backends that can be used here, by preference.
+    """
+    available = []
+    for name in CIPHER_BACKENDS:
+        try:
+            if name in _BACKEND_MODULES:
+                import_module(_BACKEND_MODULES[name])
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+def get_backend() -> str:
+    global _backend
+    if _backend is None:
+        _backend = available_backends()[0]
+    return _backend
+
+def set_backend(name: str) -> None:
+    """
+    Use the `name` AES backend from now on. Ciphers already handed out keep theirs.
+    """
+    global _backend
+    if name not in CIPHER_BACKENDS:
+        raise ValueError('unknown AES backend: {}'.format(name))
+    _backend = name
+
+# Expanding an AES key costs about as much as encrypting a few blocks, and the attacks
+# below encrypt under the same key thousands of times, so keep the cipher objects around.
+CIPHER_CACHE_SIZE = 64
+
+@lru_cache(maxsize=CIPHER_CACHE_SIZE)
+def _cached_cipher(key: bytes, backend: str):
+    return CIPHER_BACKENDS[backend](key)
+
+def aes_cipher(key: bytes, backend: Optional[str] = None):
+    """
+    A shared AES-ECB cipher object for `key`, from an LRU cache keyed on the key and backend.
+    Every mode in this module is built on ECB, which has no state between calls.
+    """
+    return _cached_cipher(bytes(key), backend or get_backend())
+
+def encrypt_blocks(blocks: Sequence[bytes], key: bytes, backend: Optional[str] = None) -> List[bytes]:
+    """
+    Encrypt many independent blocks under `key`, in one call to the backend.
+    """
+    return list(chunks(aes_cipher(key, backend).encrypt(b''.join(blocks)), AES_BLOCK_SIZE))
+
+def decrypt_blocks(blocks: Sequence[bytes], key: bytes, backend: Optional[str] = None) -> List[bytes]:
+    """
+    Decrypt many independent blocks under `key`, in one call to the backend.
+    """
+    return list(chunks(aes_cipher(key, backend).decrypt(b''.join(blocks)), AES_BLOCK_SIZE))
 
 def pkcs7pad(bs: bytes, blocksize: Optional[int] = None) -> bytes:
     """
@@ -47,13 +148,69 @@ def pkcs7pad(bs: bytes, blocksize: Optional[int] = None) -> bytes:
     numpad = blocksize - missing
     return bs + bytes([numpad])*numpad
 
-def pkcs7unpad(bs: bytes) -> bytes:
+class PaddingError(ValueError):
+    """
+    The PKCS#7 padding is invalid. The message never says why,
+    so that it can't tell a padding oracle attacker more than the fact.
+    """
+
+def _padding_size(bs: Union[bytes, bytearray, memoryview], blocksize: Optional[int]) -> int:
+    """
+    The number of padding bytes at the end of `bs`, after checking them.
+
+    Always compares the same number of trailing bytes, with hmac.compare_digest,
+    instead of stopping at the first bad one.
+    """
+    size = len(bs)
+    if not size or (blocksize is not None and size % blocksize):
+        raise PaddingError('invalid padding')
+    span = min(size, blocksize or 256)
+    tail = bytes(bs[size - span:])
+    numpad = tail[-1]
+    valid = 0 < numpad <= span
+    # what the tail should be: its own bytes, followed by numpad bytes of numpad
+    cut = span - min(numpad, span)
+    expected = tail[:cut] + bytes([numpad]) * (span - cut)
+    if not hmac.compare_digest(tail, expected) or not valid:
+        raise PaddingError('invalid padding')
+    return numpad
+
+def pkcs7unpad(bs: bytes, blocksize: Optional[int] = None) -> bytes:
     """
     A simple reverse operation.
-    We look up the last value to tell how many bytes to remove.
+    We look up the last value to tell how many bytes to remove,
+    raising PaddingError unless all of them hold that value.
+    With a `blocksize`, the length must also be a multiple of it, and the padding at most a block.
     """
-    num_bytes = bs[-1]
-    return bs[:-num_bytes]
+    return bs[:len(bs) - _padding_size(bs, blocksize)]
+
+def pkcs7pad_inplace(buf: bytearray, blocksize: Optional[int] = None) -> bytearray:
+    """
+    pkcs7pad, extending `buf` itself. Returns it.
+    """
+    if blocksize is None:
+        blocksize = 16
+    numpad = blocksize - len(buf) % blocksize
+    buf.extend(bytes([numpad]) * numpad)
+    return buf
+
+def _pkcs7padded(bs: bytes, blocksize: int) -> bytes:
+    # pkcs7pad for any bytes-like input: join sizes the result up front,
+    # so `bs` is copied once, straight into it.
+    numpad = blocksize - len(bs) % blocksize
+    return b''.join((bs, bytes([numpad]) * numpad))
+
+def pkcs7unpad_inplace(buf: Union[bytearray, memoryview],
+                       blocksize: Optional[int] = None) -> Union[bytearray, memoryview]:
+    """
+    pkcs7unpad without copying: a bytearray is truncated and returned,
+    a memoryview is returned sliced.
+    """
+    numpad = _padding_size(buf, blocksize)
+    if isinstance(buf, memoryview):
+        return buf[:len(buf) - numpad]
+    del buf[len(buf) - numpad:]
+    return buf
 
 def ecb_encrypt(bs: bytes, key: bytes) -> bytes:
     """
@@ -63,10 +220,7 @@ def ecb_encrypt(bs: bytes, key: bytes) -> bytes:
     Implement CBC mode by hand by taking the ECB function you wrote earlier,
     making it encrypt instead of decrypt
     """
-    blocksize = len(key)
-    padded_bs = pkcs7pad(bs, blocksize)
-    cipher = AES.new(key, AES.MODE_ECB)
-    return cipher.encrypt(padded_bs)
+    return aes_cipher(key).encrypt(_pkcs7padded(bs, len(key)))
 
 def cbc_encrypt(bs: bytes, key: bytes, iv: Optional[bytes] = None) -> bytes:
     """
@@ -86,35 +240,133 @@ def cbc_encrypt(bs: bytes, key: bytes, iv: Optional[bytes] = None) -> bytes:
     making it encrypt instead of decrypt (verify this by decrypting whatever you encrypt to test),
     and using your XOR function from the previous exercise to combine them.
     """
+    encryptor = CBCEncryptor(key, iv)
+    return encryptor.update(bs) + encryptor.finalize()
 
-    # build the zeroth block
-    blocksize = len(key)
-    cipherblock = iv or b'\x00' * blocksize
-
-    # pad the plaintext
-    padded_bs = pkcs7pad(bs, blocksize)
-
-    cipher = AES.new(key, AES.MODE_ECB)
-    ciphertext = b''
-    for plainblock in chunks(padded_bs, blocksize):
-        cipherblock = cipher.encrypt(fixed_len_xor(plainblock, cipherblock))
-        ciphertext += cipherblock
-    return ciphertext
-
-def cbc_decrypt(bs: bytes, key: bytes, iv: Optional[bytes] = None) -> bytes:
+def cbc_decrypt(bs: bytes, key: bytes, iv: Optional[bytes] = None, workers: Optional[int] = None,
+                executor: Optional[Executor] = None, segment_size: int = 1 << 22) -> bytes:
     """
     Simple inverse, assuming we have the key, and possibly the IV.
+
+    Unlike encryption, no block depends on the output for another one:
+    each plaintext block is D(C_i) ^ C_(i-1), see _cbc_decrypt_blocks.
+    So with `workers` (or an existing `executor`) the ciphertext is cut into
+    segments of `segment_size` bytes, decrypted on a process pool, each one
+    with the last ciphertext block before it as its IV.
     """
+    if workers and executor is None:
+        with ProcessPoolExecutor(workers) as pool:
+            return cbc_decrypt(bs, key, iv, executor=pool, segment_size=segment_size)
+
     blocksize = len(key)
+    if len(bs) % blocksize:
+        raise ValueError('ciphertext is not a multiple of the block size')
+    if not bs:
+        return b''
     iv = iv or b'\x00' * blocksize
-    cipher = AES.new(key, AES.MODE_ECB)
-    plaintext = b''
+    view = memoryview(bs)
+    segment_size = max(segment_size - segment_size % blocksize, blocksize)
+    if executor is None or len(bs) <= segment_size:
+        plaintext = _cbc_decrypt_blocks(aes_cipher(key), iv, view)
+    else:
+        starts = range(0, len(bs), segment_size)
+        ivs = [iv] + [bytes(view[start - blocksize:start]) for start in starts[1:]]
+        segments = [bytes(view[start:start + segment_size]) for start in starts]
+        decrypt = partial(_cbc_decrypt_segment, bytes(key), get_backend())
+        plaintext = b''.join(executor.map(decrypt, ivs, segments))
+    # Unpad through a view, so the only copy is the one returned.
+    return bytes(pkcs7unpad_inplace(memoryview(plaintext), blocksize))
+
+def _cbc_decrypt_blocks(cipher, iv: bytes, blocks: Union[bytes, memoryview]) -> bytes:
+    # ECB-decrypt all the blocks in a single call, then XOR them with the ciphertext
+    # shifted one block along, with the IV in front, in a single bulk XOR.
+    blocks = bytes(blocks)
+    previous = iv + blocks[:len(blocks) - len(iv)]
+    return fixed_len_xor(cipher.decrypt(blocks), previous)
+
+def _cbc_decrypt_segment(key: bytes, backend: str, iv: bytes, blocks: bytes) -> bytes:
+    # The part of cbc_decrypt that runs in the workers.
+    return _cbc_decrypt_blocks(aes_cipher(key, backend), iv, blocks)
+
+class CBCEncryptor:
+    """
+    S2C10 - Implement CBC mode
+    https://cryptopals.com/sets/2/challenges/10
+
+    Streaming CBC encryption: feed the plaintext to update() in chunks of any size,
+    then call finalize() to pad and encrypt what is left.
+    Only the last ciphertext block (the running IV) and a partial block are kept
+    between chunks, so arbitrarily large messages encrypt in fixed memory.
+    """
+    def __init__(self, key: bytes, iv: Optional[bytes] = None) -> None:
+        self.blocksize: int = len(key)
+        self._cipher = aes_cipher(key)
+        # build the zeroth block
+        self._iv: bytes = iv or b'\x00' * self.blocksize
+        self._pending: bytearray = bytearray()
+
+    def update(self, bs: bytes) -> bytes:
+        self._pending += bs
+        size = len(self._pending) - len(self._pending) % self.blocksize
+        out = self._encrypt_blocks(memoryview(self._pending)[:size])
+        del self._pending[:size]
+        return out
+
+    def finalize(self) -> bytes:
+        # pad the plaintext
+        pkcs7pad_inplace(self._pending, self.blocksize)
+        out = self._encrypt_blocks(memoryview(self._pending))
+        self._pending.clear()
+        return out
+
+    def _encrypt_blocks(self, blocks: memoryview) -> bytes:
+        out = bytearray(len(blocks))
+        blocksize = self.blocksize
+        cipherblock = self._iv
+        for i in range(0, len(blocks), blocksize):
+            cipherblock = self._cipher.encrypt(fixed_len_xor(blocks[i:i + blocksize], cipherblock))
+            out[i:i + blocksize] = cipherblock
+        self._iv = cipherblock
+        return bytes(out)
+
+class CBCDecryptor:
+    """
+    Streaming CBC decryption, the inverse of CBCEncryptor.
 
-    for cipherblock in chunks(bs, blocksize):
-        block = fixed_len_xor(cipher.decrypt(cipherblock), iv)
-        plaintext += block
-        iv = cipherblock
-    return pkcs7unpad(plaintext)
+    The last full block is held back until finalize(), since it's the only one
+    that carries padding.
+    """
+    def __init__(self, key: bytes, iv: Optional[bytes] = None) -> None:
+        self.blocksize: int = len(key)
+        self._cipher = aes_cipher(key)
+        self._iv: bytes = iv or b'\x00' * self.blocksize
+        self._pending: bytearray = bytearray()
+
+    def update(self, bs: bytes) -> bytes:
+        self._pending += bs
+        # Keep at least one full block back for finalize() to unpad.
+        size = len(self._pending) - len(self._pending) % self.blocksize
+        if size == len(self._pending):
+            size -= self.blocksize
+        if size <= 0:
+            return b''
+        out = self._decrypt_blocks(memoryview(self._pending)[:size])
+        del self._pending[:size]
+        return out
+
+    def finalize(self) -> bytes:
+        if len(self._pending) % self.blocksize:
+            raise ValueError('ciphertext is not a multiple of the block size')
+        if not self._pending:
+            return b''
+        plaintext = self._decrypt_blocks(memoryview(self._pending))
+        self._pending.clear()
+        return bytes(pkcs7unpad_inplace(memoryview(plaintext), self.blocksize))
+
+    def _decrypt_blocks(self, blocks: memoryview) -> bytes:
+        out = _cbc_decrypt_blocks(self._cipher, self._iv, blocks)
+        self._iv = bytes(blocks[len(blocks) - self.blocksize:])
+        return out
 
 def encryption_oracle(bs: bytes, blocksize: int =16) -> Tuple[bytes, str]:
     """
@@ -140,6 +392,93 @@ def encryption_oracle(bs: bytes, blocksize: int =16) -> Tuple[bytes, str]:
         iv = os.urandom(blocksize)
         return cbc_encrypt(inp, key, iv), 'cbc'
 
+def encryption_oracle_samples(count: int, plaintext: Optional[bytes] = None,
+                              blocksize: int = 16) -> Iterator[Tuple[bytes, str]]:
+    """
+    S2C11 - An ECB/CBC detection oracle
+    https://cryptopals.com/sets/2/challenges/11
+
+    `count` (ciphertext, mode) samples from encryption_oracle, generated lazily.
+
+    The default plaintext is 3 blocks of the same byte: whatever the 5-10 bytes
+    in front, it covers two identical aligned blocks, which ECB gives away.
+    """
+    if plaintext is None:
+        plaintext = b'A' * (3 * blocksize)
+    for _ in range(count):
+        yield encryption_oracle(plaintext, blocksize)
+
+class ModePrediction(NamedTuple):
+    mode: str
+    # probability that mode is right, given the block repetitions
+    confidence: float
+    repeats: int
+    blocks: int
+
+def classify_modes(ciphertexts: Iterable[bytes], blocksize: int = 16,
+                   planted: bool = False) -> Iterator[ModePrediction]:
+    """
+    S2C11 - An ECB/CBC detection oracle
+    https://cryptopals.com/sets/2/challenges/11
+
+    Predict the mode of every ciphertext, lazily, so `ciphertexts` may be any stream.
+
+    Under CBC, blocks look random: any two of n blocks are equal with probability
+    1 / 2^(8 * blocksize), so chance repeats are about Poisson distributed, with
+    n(n - 1)/2 of that as their expected count. The confidence weighs the repeats
+    seen against that expectation:
+
+    - ECB, when there are repeats: the probability that chance alone would have
+      made fewer of them. More repeats, or fewer expected, make it surer.
+    - CBC, when there are none: the probability that chance makes none, which
+      falls as the blocks add up. If the plaintexts are known
+      to hold repeated blocks (`planted`, as in encryption_oracle_samples), ECB
+      can't explain a ciphertext without repeats, and that is the confidence.
+      Otherwise, ECB of plaintext with no repeated blocks looks just like CBC,
+      and it is halved.
+    """
+    block_space = 2 ** (8 * blocksize)
+    for ciphertext in ciphertexts:
+        repeats, blocks = ecb_repetitions(ciphertext, blocksize)
+        expected = blocks * (blocks - 1) / 2 / block_space
+        # P(no chance repeats), the first term of the Poisson distribution
+        term = math.exp(-expected)
+        if repeats:
+            fewer = 0.0
+            for k in range(repeats):
+                fewer += term
+                term *= expected / (k + 1)
+            yield ModePrediction('ecb', min(1.0, fewer), repeats, blocks)
+        else:
+            yield ModePrediction('cbc', term if planted else term / 2, repeats, blocks)
+
+class ClassifierReport(NamedTuple):
+    samples: int
+    correct: int
+    seconds: float
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.samples if self.samples else 0.0
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.seconds if self.seconds else 0.0
+
+def evaluate_classifier(samples: Iterable[Tuple[bytes, str]], blocksize: int = 16,
+                        planted: bool = False) -> ClassifierReport:
+    """
+    Run classify_modes over labelled (ciphertext, mode) `samples`, such as
+    encryption_oracle_samples, and report its accuracy and throughput.
+    Only classification is timed, not making the samples.
+    """
+    samples = list(samples)
+    start = time.perf_counter()
+    predictions = list(classify_modes((ciphertext for ciphertext, _ in samples), blocksize, planted))
+    seconds = time.perf_counter() - start
+    correct = sum(prediction.mode == mode for prediction, (_, mode) in zip(predictions, samples))
+    return ClassifierReport(len(samples), correct, seconds)
+
 class Oracle:
     """
     S2C12 - Byte-at-a-time ECB decryption (Simple)
@@ -151,10 +490,30 @@ class Oracle:
     def __init__(self, key: bytes, unknown: bytes) -> None:
         self.key: bytes = key
         self.unknown: bytes = unknown
+        self._cipher = aes_cipher(key)
 
     def __call__(self, bs):
-        plaintext = pkcs7pad(bs + self.unknown)
-        return ecb_encrypt(bs + self.unknown, self.key)
+        return self._cipher.encrypt(pkcs7pad(bs + self.unknown, len(self.key)))
+
+class PrefixOracle(Oracle):
+    """
+    S2C14 - Byte-at-a-time ECB decryption (Harder)
+    https://cryptopals.com/sets/2/challenges/14
+
+    Take your oracle function from #12. Now generate a random count of random bytes
+    and prepend this string to every plaintext. You are now doing:
+    AES-128-ECB(random-prefix || attacker-controlled || target-bytes, random-key)
+
+    The prefix is picked once, unless one is given.
+    """
+    def __init__(self, key: bytes, unknown: bytes, prefix: Optional[bytes] = None) -> None:
+        super().__init__(key, unknown)
+        if prefix is None:
+            prefix = os.urandom(random.randint(1, 4 * len(key)))
+        self.prefix: bytes = prefix
+
+    def __call__(self, bs):
+        return self._cipher.encrypt(pkcs7pad(self.prefix + bs + self.unknown, len(self.key)))
 
 def guess_blocksize(oracle: Oracle) -> int:
     """
@@ -186,7 +545,7 @@ def guess_unknown_string_size(oracle: Oracle) -> int:
             return init_len - guess
     return -1
 
-def break_ecb(oracle: Oracle) -> bytes:
+def break_ecb(oracle: Oracle) -> 'ECBAttackResult':
     """
     S2C12 - Byte-at-a-time ECB decryption (Simple)
     https://cryptopals.com/sets/2/challenges/12
@@ -199,7 +558,11 @@ def break_ecb(oracle: Oracle) -> bytes:
     Match the output of the one-byte-short input to one of the entries in your dictionary.
     You've now discovered the first byte of unknown-string.
     Repeat for the next byte.
+
+    The result carries the oracle stats, see break_ecb_batched.
     """
+    # The discovery steps repeat each other's queries, only ask once.
+    oracle = InstrumentedOracle(oracle, cache_size=64)
     blocksize = guess_blocksize(oracle)
     unknown_string_size = guess_unknown_string_size(oracle)
     num_blocks = (unknown_string_size // blocksize) + 1
@@ -213,4 +576,250 @@ def break_ecb(oracle: Oracle) -> bytes:
                  c.encode()
                  for c in printable}
         unknown_string += table[oracle_resp]
-    return unknown_string
+    return ECBAttackResult(unknown_string, oracle.stats())
+
+class OracleStats(NamedTuple):
+    # calls that reached the oracle, and calls answered from the cache
+    queries: int
+    cache_hits: int
+    # bytes of plaintext sent and ciphertext received, cache hits included
+    bytes_in: int
+    bytes_out: int
+    # seconds spent waiting on the oracle, and a histogram of per-call latencies:
+    # {upper bound in seconds: calls}, with power of two buckets from 1us up
+    latency: float
+    latency_histogram: Dict[float, int]
+
+class InstrumentedOracle:
+    """
+    Wraps any oracle callable, keeping account of what the attacks ask of it.
+
+    With a `cache_size`, responses are memoized in an LRU cache of that many entries,
+    so repeated queries (say, oracle(b'')) only reach the oracle once.
+    Only use it with deterministic oracles.
+    """
+    def __init__(self, oracle: Callable[[bytes], bytes], cache_size: int = 0) -> None:
+        self.oracle = oracle
+        self.cache_size: int = cache_size
+        self._cache: 'OrderedDict[bytes, bytes]' = OrderedDict()
+        self.queries: int = 0
+        self.cache_hits: int = 0
+        self.bytes_in: int = 0
+        self.bytes_out: int = 0
+        self.latency: float = 0.0
+        self.latency_histogram: Dict[float, int] = {}
+
+    def __call__(self, bs: bytes) -> bytes:
+        bs = bytes(bs)
+        resp = self._cached(bs)
+        if resp is None:
+            start = time.perf_counter()
+            resp = self.oracle(bs)
+            self._record(bs, resp, time.perf_counter() - start)
+        self.bytes_in += len(bs)
+        self.bytes_out += len(resp)
+        return resp
+
+    def _cached(self, bs: bytes) -> Optional[bytes]:
+        resp = self._cache.get(bs)
+        if resp is not None:
+            self._cache.move_to_end(bs)
+            self.cache_hits += 1
+        return resp
+
+    def _record(self, bs: bytes, resp: bytes, elapsed: float) -> None:
+        self.queries += 1
+        self.latency += elapsed
+        bucket = 1e-6
+        while bucket < elapsed:
+            bucket *= 2
+        self.latency_histogram[bucket] = self.latency_histogram.get(bucket, 0) + 1
+        if self.cache_size:
+            self._cache[bs] = resp
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> OracleStats:
+        return OracleStats(self.queries, self.cache_hits, self.bytes_in, self.bytes_out,
+                           self.latency, dict(sorted(self.latency_histogram.items())))
+
+class ECBAttackResult(NamedTuple):
+    plaintext: bytes
+    stats: OracleStats
+
+    @property
+    def queries(self) -> int:
+        return self.stats.queries
+
+def candidate_order(model: Optional[LanguageModel] = None, previous: Optional[int] = None) -> bytes:
+    """
+    All 256 byte values, most likely first according to `model` (english by default).
+    Bigram models take the `previous` byte into account.
+    """
+    model = model or _english()
+    if previous is not None and model.bigram_log_probs is not None:
+        row = model.bigram_log_probs[previous << 8:(previous + 1) << 8]
+        return bytes(sorted(range(256), key=lambda b: -row[b]))
+    return bytes(sorted(range(256), key=lambda b: -model.probs[b]))
+
+@lru_cache(maxsize=None)
+def _english() -> LanguageModel:
+    # built on first use, compiling a model isn't free
+    return LanguageModel.from_frequencies()
+
+class OracleProfile(NamedTuple):
+    blocksize: int
+    # bytes the oracle appends after, and prepends before, the attacker bytes.
+    # prefix_size is None when it can't be told, because the oracle isn't ECB.
+    unknown_size: int
+    prefix_size: Optional[int]
+    ecb: bool
+
+def _first_true(predicate: Callable[[int], bool], low: int, search: str,
+                high: Optional[int] = None) -> int:
+    """
+    The smallest n >= low for which the monotone `predicate` holds.
+
+    'linear' tries n = low, low + 1, ... in turn. 'binary' doubles the step
+    until the predicate holds, then bisects the last gap,
+    for a logarithmic number of calls. When the predicate is known to hold
+    at `high`, 'binary' bisects [low, high] straight away.
+    """
+    if search == 'linear':
+        return next(n for n in count(low) if predicate(n))
+    if search != 'binary':
+        raise ValueError('unknown search: {}'.format(search))
+    if high is None:
+        step = 1
+        while not predicate(low + step - 1):
+            low, step = low + step, step * 2
+        high = low + step - 1
+    while low < high:
+        mid = (low + high) // 2
+        if predicate(mid):
+            high = mid
+        else:
+            low = mid + 1
+    return low
+
+def profile_oracle(oracle: Callable[[bytes], bytes], search: str = 'binary') -> OracleProfile:
+    """
+    S2C12 - Byte-at-a-time ECB decryption (Simple)
+    https://cryptopals.com/sets/2/challenges/12
+
+    Blocksize, unknown string size, prefix size and ECB detection, all from
+    one sequence of b"A" * n probes.
+
+    The ciphertext first grows, by exactly one block, when the attacker bytes
+    fill the last block up: that gives the blocksize and prefix + unknown size.
+    Then 3 blocks worth of b"A" always hold two identical aligned blocks under ECB,
+    and the shortest run that still does tells the prefix alignment.
+
+    Only repeats made of attacker bytes count: the prefix and the unknown string
+    may hold identical blocks of their own. Swapping a single attacker byte,
+    b"A" for b"B", first changes the block where the prefix ends, and the blocks
+    before it are all prefix. From there, only pairs of blocks that the run
+    of b"A" may cover entirely are looked at.
+
+    With search='binary' both lengths are searched for in a logarithmic number
+    of queries. Repeated probes are only sent once.
+    """
+    oracle = InstrumentedOracle(oracle, cache_size=256)
+    probe = lambda n: oracle(b'A' * n)
+
+    init_len = len(probe(0))
+    first_growth = _first_true(lambda n: len(probe(n)) > init_len, 1, search)
+    blocksize = len(probe(first_growth)) - init_len
+    hidden_size = init_len - first_growth
+
+    # The first block that changes with the attacker bytes holds the end of the prefix.
+    changed = [i for i, (b, c) in enumerate(zip(chunks(probe(1), blocksize), chunks(oracle(b'B'), blocksize)))
+               if b != c]
+    prefix_block = changed[0] if changed else 0
+
+    def repeated_block(n: int) -> Optional[int]:
+        # The B fences stop the run of A from merging with any A at the end
+        # of the prefix or at the start of the unknown string.
+        blocks = list(chunks(oracle(b'B' + b'A' * n + b'B'), blocksize))
+        # Past prefix_block - 1 + n // blocksize, the second block of a pair lies
+        # beyond the run of A, whatever the prefix size.
+        window = range(prefix_block, min(prefix_block + n // blocksize, len(blocks) - 1))
+        return next((i for i in window if blocks[i] == blocks[i + 1]), None)
+
+    # Whatever the prefix, 3 blocks of b"A" cover two aligned blocks.
+    first_repeat = repeated_block(3 * blocksize)
+    if first_repeat is None:
+        return OracleProfile(blocksize, hidden_size, None, False)
+
+    # The shortest run still covering two aligned blocks is 2 * blocksize + padding,
+    # where padding fills the prefix (and the first fence) up to a block boundary.
+    shortest = _first_true(lambda n: repeated_block(n) == first_repeat, 2 * blocksize, search, 3 * blocksize)
+    prefix_size = first_repeat * blocksize - (shortest - 2 * blocksize) - 1
+    if not prefix_block * blocksize <= prefix_size < (prefix_block + 1) * blocksize or prefix_size > hidden_size:
+        raise ValueError('inconsistent prefix size {}, the oracle may not be deterministic ECB'.format(prefix_size))
+    return OracleProfile(blocksize, hidden_size - prefix_size, prefix_size, True)
+
+def break_ecb_batched(oracle: Callable[[bytes], bytes], batch: int = 256,
+                      model: Optional[LanguageModel] = None) -> ECBAttackResult:
+    """
+    S2C12 - Byte-at-a-time ECB decryption (Simple)
+    https://cryptopals.com/sets/2/challenges/12
+
+    A query efficient take on break_ecb that recovers the whole unknown string,
+    whatever bytes it holds.
+
+    The target block for every position comes from one of only `blocksize`
+    short-by-n queries, which are made once and reused.
+    Since ECB encrypts every block on its own, one query can hold up to `batch`
+    single block dictionary entries: the last blocksize - 1 known bytes followed by
+    each candidate. Candidates go most likely first (see candidate_order),
+    so with a smaller `batch` most bytes are still found by the first query.
+
+    Blocksize and size come from profile_oracle, whose probes are cached and
+    reused as short-by-n queries. The result carries the oracle stats.
+
+    S2C14 - Byte-at-a-time ECB decryption (Harder)
+    https://cryptopals.com/sets/2/challenges/14
+
+    Oracles that prepend a prefix work too: profile_oracle finds its size from
+    the planted identical blocks, then every query starts with enough fill bytes
+    to complete the prefix's last block, and the prefix blocks are cut off every
+    response. That's the simple case again, for a handful of extra queries.
+    """
+    instrumented = InstrumentedOracle(oracle, cache_size=64)
+    profile = profile_oracle(instrumented)
+    blocksize, unknown_string_size = profile.blocksize, profile.unknown_size
+
+    aligned: Callable[[bytes], bytes] = instrumented
+    if profile.prefix_size:
+        # The fill is more b"A", so short-by-n queries are still cached probes.
+        fill = b'A' * (-profile.prefix_size % blocksize)
+        skip = profile.prefix_size + len(fill)
+        aligned = lambda bs: instrumented(fill + bs)[skip:]
+
+    # short_by_n[n] = oracle(b"A" * n), for n in range(blocksize)
+    short_by_n: Dict[int, bytes] = {}
+
+    unknown_string = b''
+    for i in range(unknown_string_size):
+        n = blocksize - 1 - i % blocksize
+        if n not in short_by_n:
+            short_by_n[n] = aligned(b'A' * n)
+        block = i // blocksize
+        target = short_by_n[n][block * blocksize:(block + 1) * blocksize]
+
+        window = (b'A' * (blocksize - 1) + unknown_string)[-(blocksize - 1):]
+        previous = unknown_string[-1] if unknown_string else None
+        candidates = candidate_order(model, previous)
+        for start in range(0, 256, batch):
+            group = candidates[start:start + batch]
+            resp = aligned(b''.join(window + bytes([c]) for c in group))
+            # dictionary block -> candidate, so the target is a single lookup
+            table = {resp[k * blocksize:(k + 1) * blocksize]: c for k, c in enumerate(group)}
+            found = table.get(target)
+            if found is not None:
+                unknown_string += bytes([found])
+                break
+        else:
+            break
+    return ECBAttackResult(unknown_string, instrumented.stats())
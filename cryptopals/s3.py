@@ -0,0 +1,250 @@
+"""
+Crypto Challenge Set 3
+https://cryptopals.com/sets/3
+
+This is the next set of block cipher cryptography challenges
+(even the randomness stuff here plays into block cipher crypto).
+
+This set is moderately difficult. It includes a famous attack against CBC mode,
+and a "cloning" attack on a popular RNG that can be annoying to get right.
+"""
+import os
+import random
+import sys
+import threading
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from cryptopals.language import LanguageModel
+from cryptopals.s2 import AES_BLOCK_SIZE, PaddingError, aes_cipher, candidate_order, cbc_decrypt, cbc_encrypt
+from cryptopals.s2 import get_backend, pkcs7unpad
+from cryptopals.s1 import chunks, fixed_len_xor
+
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+PaddingOracleType = Callable[[bytes, bytes], bool]
+
+
+class PaddingOracle:
+    """
+    S3C17 - The CBC padding oracle
+    https://cryptopals.com/sets/3/challenges/17
+
+    The first function should select at random one of the following 10 strings,
+    generate a random AES key (which it should save for all future encryptions),
+    pad the string out to the 16-byte AES block size and CBC-encrypt it under that key,
+    providing the caller the ciphertext and IV.
+
+    The second function should consume the ciphertext produced by the first function,
+    decrypt it, check its padding, and return true or false depending on whether
+    the padding is valid.
+    """
+    def __init__(self, plaintexts: Sequence[bytes], key: Optional[bytes] = None, blocksize: int = 16) -> None:
+        self.plaintexts: Sequence[bytes] = plaintexts
+        self.blocksize: int = blocksize
+        self.key: bytes = key or os.urandom(blocksize)
+
+    def encrypt(self) -> Tuple[bytes, bytes]:
+        iv = os.urandom(self.blocksize)
+        return cbc_encrypt(random.choice(self.plaintexts), self.key, iv), iv
+
+    def __call__(self, ciphertext: bytes, iv: bytes) -> bool:
+        try:
+            cbc_decrypt(ciphertext, self.key, iv)
+        except PaddingError:
+            return False
+        return True
+
+
+class PaddingOracleResult(NamedTuple):
+    plaintext: bytes
+    # calls to the oracle, and how many bytes they recovered
+    queries: int
+    recovered: int
+
+    @property
+    def queries_per_byte(self) -> float:
+        return self.queries / self.recovered if self.recovered else 0.0
+
+
+class _CountingOracle:
+    # Counts the calls to a padding oracle, from any number of threads.
+    def __init__(self, oracle: PaddingOracleType) -> None:
+        self.oracle = oracle
+        self.queries: int = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, ciphertext: bytes, iv: bytes) -> bool:
+        with self._lock:
+            self.queries += 1
+        return self.oracle(ciphertext, iv)
+
+
+def recover_block(oracle: PaddingOracleType, previous: bytes, block: bytes,
+                  order: bytes, last: bool = False) -> bytes:
+    """
+    S3C17 - The CBC padding oracle
+    https://cryptopals.com/sets/3/challenges/17
+
+    The plaintext of one ciphertext `block`, from the `previous` block (or the IV).
+
+    The oracle is asked about `block` alone, behind a forged IV F.
+    It decrypts to D(block) ^ F, so the padding is valid with a last byte of 1
+    exactly when F[-1] = D(block)[-1] ^ 1. Guessing plaintext byte g means trying
+    F[-1] = previous[-1] ^ g ^ 1, and the guesses are made in `order`, most likely first.
+    Once a byte is known, the bytes after it are set to decrypt to the next padding value.
+
+    The `last` block of a message ends in padding, so once its final byte n is known,
+    n is guessed first for the n - 1 bytes before it.
+    """
+    blocksize = len(block)
+    known = bytearray(blocksize)
+    forged = bytearray(blocksize)
+    for pad in range(1, blocksize + 1):
+        i = blocksize - pad
+        for k in range(i + 1, blocksize):
+            forged[k] = previous[k] ^ known[k] ^ pad
+        guesses = order
+        if last and pad > 1 and 0 < known[-1] <= blocksize and i >= blocksize - known[-1]:
+            guesses = bytes([known[-1]]) + order.replace(bytes([known[-1]]), b'')
+        for guess in guesses:
+            forged[i] = previous[i] ^ guess ^ pad
+            if not oracle(block, bytes(forged)):
+                continue
+            if pad == 1 and i > 0:
+                # The padding might have been \x02\x02 (or longer) instead of \x01:
+                # it isn't if changing the byte before still gives valid padding.
+                check = bytearray(forged)
+                check[i - 1] ^= 0xff
+                if not oracle(block, bytes(check)):
+                    continue
+            known[i] = guess
+            break
+        else:
+            raise ValueError('the oracle accepted no padding for byte {}'.format(i))
+    return bytes(known)
+
+
+def padding_oracle_attack(oracle: PaddingOracleType, ciphertext: bytes, iv: bytes,
+                          workers: Optional[int] = None, executor: Optional[Executor] = None,
+                          model: Optional[LanguageModel] = None) -> PaddingOracleResult:
+    """
+    S3C17 - The CBC padding oracle
+    https://cryptopals.com/sets/3/challenges/17
+
+    Decrypt `ciphertext` with nothing but the padding `oracle`, see recover_block.
+
+    Every block only depends on itself and the one before it, so all blocks are recovered
+    independently: on a thread pool of `workers` (or an existing `executor`), which pays off
+    when the oracle is a network round trip. Guesses follow `model` (english by default),
+    and the plaintext is returned unpadded, along with the number of oracle queries.
+    """
+    if workers and executor is None:
+        with ThreadPoolExecutor(workers) as pool:
+            return padding_oracle_attack(oracle, ciphertext, iv, executor=pool, model=model)
+
+    blocksize = len(iv)
+    counted = _CountingOracle(oracle)
+    order = candidate_order(model)
+    blocks: List[bytes] = list(chunks(ciphertext, blocksize))
+    previous = [iv] + blocks[:-1]
+
+    def recover(i: int) -> bytes:
+        return recover_block(counted, previous[i], blocks[i], order, last=i == len(blocks) - 1)
+
+    indices = range(len(blocks))
+    recovered = map(recover, indices) if executor is None else executor.map(recover, indices)
+    plaintext = b''.join(recovered)
+    return PaddingOracleResult(pkcs7unpad(plaintext, blocksize), counted.queries, len(plaintext))
+
+
+def _counter_blocks(nonce: int, first: int, last: int) -> bytes:
+    # The CTR inputs for blocks first to last: a 64 bit little endian nonce,
+    # then a 64 bit little endian block count, built as one array of words.
+    count = last - first
+    words = array('Q', bytes(2 * 8 * count))
+    words[0::2] = array('Q', [nonce]) * count
+    words[1::2] = array('Q', range(first, last))
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words.tobytes()
+
+
+def ctr_keystream(key: bytes, size: int, nonce: int = 0, offset: int = 0,
+                  backend: Optional[str] = None) -> bytes:
+    """
+    S3C18 - Implement CTR, the stream cipher mode
+    https://cryptopals.com/sets/3/challenges/18
+
+    CTR mode does not encrypt plaintext, it encrypts a running counter,
+    producing a 16 byte block of keystream, which is XOR'd against the plaintext.
+
+    `size` bytes of keystream, starting `offset` bytes into the stream.
+    Every counter block is built up front and encrypted in a single call.
+    """
+    if size <= 0:
+        return b''
+    first = offset // AES_BLOCK_SIZE
+    last = -(-(offset + size) // AES_BLOCK_SIZE)
+    keystream = aes_cipher(key, backend).encrypt(_counter_blocks(nonce, first, last))
+    skip = offset - first * AES_BLOCK_SIZE
+    return keystream[skip:skip + size]
+
+
+class CTR:
+    """
+    S3C18 - Implement CTR, the stream cipher mode
+    https://cryptopals.com/sets/3/challenges/18
+
+    A CTR mode stream. Encryption and decryption are the same operation:
+    update() XORs its input with the keystream at the current position, and moves past it.
+    Since any keystream block only depends on its counter, seek() jumps anywhere
+    in the stream without going through what comes before.
+    """
+    def __init__(self, key: bytes, nonce: int = 0) -> None:
+        self.key: bytes = key
+        self.nonce: int = nonce
+        self._position: int = 0
+
+    def seek(self, offset: int) -> None:
+        if offset < 0:
+            raise ValueError('negative seek position {}'.format(offset))
+        self._position = offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def update(self, bs: bytes) -> bytes:
+        keystream = ctr_keystream(self.key, len(bs), self.nonce, self._position)
+        self._position += len(bs)
+        return fixed_len_xor(bs, keystream)
+
+
+def ctr_crypt(bs: bytes, key: bytes, nonce: int = 0, offset: int = 0, workers: Optional[int] = None,
+              executor: Optional[Executor] = None, segment_size: int = 1 << 22) -> bytes:
+    """
+    S3C18 - Implement CTR, the stream cipher mode
+    https://cryptopals.com/sets/3/challenges/18
+
+    Encrypt or decrypt `bs`, which sits `offset` bytes into the stream, in one go.
+
+    With `workers` (or an existing `executor`), `bs` is cut into segments of `segment_size`
+    bytes, and each one is XOR'd with its own stretch of keystream on a process pool.
+    """
+    if workers and executor is None:
+        with ProcessPoolExecutor(workers) as pool:
+            return ctr_crypt(bs, key, nonce, offset, executor=pool, segment_size=segment_size)
+
+    if executor is None or len(bs) <= segment_size:
+        return fixed_len_xor(bs, ctr_keystream(key, len(bs), nonce, offset))
+    view = memoryview(bs)
+    starts = range(0, len(bs), segment_size)
+    segments = [bytes(view[start:start + segment_size]) for start in starts]
+    crypt = partial(_ctr_segment, bytes(key), get_backend(), nonce)
+    return b''.join(executor.map(crypt, [offset + start for start in starts], segments))
+
+
+def _ctr_segment(key: bytes, backend: str, nonce: int, offset: int, segment: bytes) -> bytes:
+    # The part of ctr_crypt that runs in the workers.
+    return fixed_len_xor(segment, ctr_keystream(key, len(segment), nonce, offset, backend))
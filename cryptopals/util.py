@@ -1,6 +1,6 @@
 # A file to keep all sorts of unrelated utilities
 # Mostly used in tests.
-import pytest
+from typing import Union
 
 eng_freqs = {'E': 12.70, 'T': 9.06, 'A': 8.17, 'O': 7.51,
              'I': 6.97, 'N': 6.75, 'S': 6.33, 'H': 6.09,
@@ -11,24 +11,9 @@ eng_freqs = {'E': 12.70, 'T': 9.06, 'A': 8.17, 'O': 7.51,
              'Q': 0.10, 'Z': 0.07, ' ': 2}
 
 
-def shortest_repeater(s: str) -> str:
-    # Taken from Stack Overflow, by Buge
-    # https://stackoverflow.com/questions/6021274/finding-shortest-repeating-cycle-in-word/33864413#33864413
+def shortest_repeater(s: Union[str, bytes]) -> Union[str, bytes]:
+    # The shortest piece `s` is a whole number of repetitions of:
+    # `s` is a rotation of itself by exactly those lengths, see cryptopals.period.
     if not s:
         return s
-    nxt = [0] * len(s)
-    for i in range(1, len(nxt)):
-        k = nxt[i - 1]
-        while True:
-            if s[i] == s[k]:
-                nxt[i] = k + 1
-                break
-            elif k == 0:
-                nxt[i] = 0
-                break
-            else:
-                k = nxt[k - 1]
-    small_piece_len = len(s) - nxt[-1]
-    if len(s) % small_piece_len != 0:
-        return s
-    return s[0:small_piece_len]
+    return s[:(s + s).find(s, 1)]
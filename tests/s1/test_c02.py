@@ -67,3 +67,19 @@ class TestXOR:
         ones = repeat(1)
         negated = fixed_len_xor(bs, ones)
         assert bs == fixed_len_xor(negated, ones)
+
+    @given(binary(), binary())
+    def test_truncates_like_zip(self, bs1, bs2):
+        """
+        Buffers of different lengths are XOR'd up to the shortest one.
+        """
+        expected = bytes(a ^ b for a, b in zip(bs1, bs2))
+        assert fixed_len_xor(bs1, bs2) == expected
+
+    @given(binary(), binary())
+    def test_buffer_types(self, bs1, bs2):
+        """
+        bytearray and memoryview inputs behave just like bytes.
+        """
+        expected = fixed_len_xor(bs1, bs2)
+        assert fixed_len_xor(bytearray(bs1), memoryview(bs2)) == expected
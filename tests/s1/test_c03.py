@@ -1,9 +1,10 @@
 from string import ascii_uppercase
 
 from hypothesis import given, example
-from hypothesis.strategies import sampled_from, just, binary
+from hypothesis.strategies import sampled_from, just, binary, integers
 
-from cryptopals.s1 import break_single_char_xor, single_char_xor, english_score
+from cryptopals.s1 import break_single_char_xor, single_char_xor, english_score, rank_single_char_xor
+from cryptopals.language import LanguageModel
 
 def test_challenge3():
     # The hex encoded string:
@@ -50,3 +51,60 @@ def test_finding_key(bs, key):
     xord = single_char_xor(bs, key)
     retrieved_key, score = break_single_char_xor(xord)
     assert retrieved_key == key
+
+class TestRanking:
+    @given(binary(min_size=1))
+    def test_scores_match_english_score(self, bs):
+        """
+        Scoring from the histogram must agree with scoring the deciphered text.
+        """
+        for key, score in rank_single_char_xor(bs):
+            expected = english_score(single_char_xor(bs, key))
+            assert abs(score - expected) < 1e-9
+
+    @given(binary(), integers(min_value=1, max_value=256))
+    def test_ranked_top(self, bs, top):
+        ranked = rank_single_char_xor(bs, top)
+        assert len(ranked) == top
+        scores = [score for _, score in ranked]
+        assert scores == sorted(scores)
+
+
+def english_models():
+    with open('tests/data/english_sample.txt', 'rb') as f:
+        corpus = f.read()
+    return [LanguageModel.from_frequencies(),
+            LanguageModel.from_frequencies(mode='chi2'),
+            LanguageModel.train(corpus, bigrams=False),
+            LanguageModel.train(corpus)]
+
+MODELS = english_models()
+
+class TestLanguageModel:
+    @given(sampled_from(MODELS), binary(min_size=1))
+    def test_rank_matches_score(self, model, bs):
+        """
+        Ranking from the histogram agrees with scoring each deciphered text.
+        """
+        for key, score in model.rank_keys(bs, 3):
+            expected = model.score(single_char_xor(bs, key))
+            assert abs(score - expected) <= 1e-3 * max(1, abs(expected))
+
+    @given(sampled_from(MODELS), sampled_from(snippets()), sampled_from(ascii_uppercase))
+    def test_finding_key(self, model, bs, key):
+        xord = single_char_xor(bs, key)
+        retrieved_key, score = break_single_char_xor(xord, model)
+        assert retrieved_key == key
+
+    def test_penalizes_binary(self):
+        model = MODELS[0]
+        assert model.score(b'\x00\x01\x02\x03') > model.score(b'#$%&')
+
+    def test_save_load(self, tmpdir):
+        path = str(tmpdir.join('english.lm'))
+        for model in MODELS:
+            model.save(path)
+            loaded = LanguageModel.load(path)
+            assert loaded.mode == model.mode
+            for bs in snippets()[:10]:
+                assert abs(loaded.score(bs) - model.score(bs)) < 1e-6
@@ -1,7 +1,9 @@
 # This challenge works against a specific data set. Fuzzing makes no sense,
 # therefore, we don't use hypothesis here.
 
-from cryptopals.s1 import break_single_char_xor
+import pytest
+
+from cryptopals.s1 import break_single_char_xor, detect_single_char_xor
 from operator import itemgetter
 
 def test_challenge4():
@@ -22,3 +24,22 @@ def test_challenge4():
     assert key == '5'
 
 
+def test_detect_single_char_xor():
+    """
+    The library scanner finds the same line, straight from the file.
+    """
+    (key, score, lineno, bs), = detect_single_char_xor('tests/data/s1c4.txt')
+    assert key == '5'
+    assert lineno == 170
+
+
+def test_detect_single_char_xor_top():
+    with open('tests/data/s1c4.txt', 'rb') as f:
+        lines = f.readlines()
+    ranked = detect_single_char_xor(iter(lines), top=5)
+    assert len(ranked) == 5
+    assert ranked[0][0] == '5'
+    scores = [score for _, score, _, _ in ranked]
+    assert scores == sorted(scores)
+    with pytest.raises(ValueError):
+        detect_single_char_xor(iter(lines), top=0)
@@ -2,9 +2,9 @@ import base64
 from string import printable
 
 from hypothesis import given, assume, note
-from hypothesis.strategies import binary, text
+from hypothesis.strategies import binary, text, lists, integers
 
-from cryptopals.s1 import hamming_dist, break_repeating_key_xor, repeating_key_xor, english_score
+from cryptopals.s1 import hamming_dist, hamming_matrix, break_repeating_key_xor, repeating_key_xor, english_score, rank_keysizes, transpose, chunks
 from cryptopals.util import shortest_repeater
 from test_util import slow
 
@@ -24,6 +24,49 @@ def test_challenge6():
     deciphered = repeating_key_xor(cipher, key)
     assert deciphered.startswith(b"I'm back")
 
+def test_challenge6_workers():
+    """
+    Cracking on a process pool must find exactly the same key.
+    """
+    with open('tests/data/s1c6.txt', 'rb') as f:
+        cipher = base64.b64decode(f.read())
+    assert break_repeating_key_xor(cipher, workers=2) == break_repeating_key_xor(cipher)
+
+def test_rank_keysizes():
+    """
+    Both scorers rank the real keysize of the challenge text first.
+    """
+    with open('tests/data/s1c6.txt', 'rb') as f:
+        cipher = base64.b64decode(f.read())
+    for method in ('hamming', 'ic'):
+        ranked = rank_keysizes(cipher, 2, 40, top=3, method=method)
+        assert len(ranked) == 3
+        assert ranked[0][0] == 29
+
+def test_short_keys():
+    """
+    On short ciphertexts, multiples of the keysize don't win over the keysize itself,
+    and keys that partly repeat themselves aren't cut short.
+    """
+    with open('tests/data/english_sample.txt', 'rb') as f:
+        text = f.read(3000)
+    for key in ['ICE', 'abc', '001', 'abac', '0001', 'XaXb']:
+        ciphertext = repeating_key_xor(text[:200], key)
+        assert shortest_repeater(break_repeating_key_xor(ciphertext)) == key
+        assert shortest_repeater(break_repeating_key_xor(ciphertext, method='ic')) == key
+    assert rank_keysizes(ciphertext, 2, 40, workers=2) == rank_keysizes(ciphertext, 2, 40)
+    for key in ['abac', 'XaXb', 'a1a2a3', '0001']:
+        assert break_repeating_key_xor(repeating_key_xor(text, key)) == key
+
+@given(binary(), integers(min_value=1, max_value=50))
+def test_transpose(bs, size):
+    """
+    Column i holds the i-th byte of every block.
+    """
+    columns = transpose(bs, size)
+    for i, block in enumerate(chunks(bs, size)):
+        assert bytes(columns[j][i] for j in range(len(block))) == block
+
 class TestHammingDistance:
     # The following properties were taken from:
     # http://www.maths.manchester.ac.uk/~pas/code/notes/part2.pdf
@@ -64,6 +107,16 @@ class TestHammingDistance:
         d = hamming_dist
         assert d(bs1, bs3) <= d(bs1, bs2) + d(bs2, bs3)
 
+@given(lists(binary(), max_size=8))
+def test_hamming_matrix(blocks):
+    """
+    The batch matrix agrees with pairwise hamming_dist, zeros on the diagonal included.
+    """
+    dist = hamming_matrix(blocks)
+    for i, b1 in enumerate(blocks):
+        for j, b2 in enumerate(blocks):
+            assert dist[i][j] == hamming_dist(b1, b2)
+
 def test_hamming_example():
     """
     S1C6 - Break repeating-key XOR
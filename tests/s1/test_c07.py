@@ -2,7 +2,11 @@
 # therefore, we don't use hypothesis here.
 
 import base64
-from Crypto.Cipher import AES
+import os
+
+import pytest
+
+from cryptopals.s2 import aes_cipher, available_backends, encrypt_blocks, decrypt_blocks
 
 def test_challenge7():
     """
@@ -19,6 +23,32 @@ def test_challenge7():
     # Decrypt it. You know the key, after all.
     # Easiest way: use OpenSSL::Cipher and give it AES-128-ECB as the cipher.
     ciphertext = base64.b64decode(text)
-    cipher = AES.new(key, AES.MODE_ECB)
+    cipher = aes_cipher(key)
     deciphered = cipher.decrypt(ciphertext)
     assert deciphered.startswith(b"I'm back")
+
+# FIPS-197 appendix C: the same plaintext under 128, 192 and 256 bit keys
+FIPS_PLAINTEXT = bytes.fromhex('00112233445566778899aabbccddeeff')
+FIPS_VECTORS = [
+    (bytes(range(16)), '69c4e0d86a7b0430d8cdb78070b4c55a'),
+    (bytes(range(24)), 'dda97ca4864cdfe06eaf70a0ec0d7191'),
+    (bytes(range(32)), '8ea2b7ca516745bfeafc49904b496089'),
+]
+
+@pytest.mark.parametrize('backend', available_backends())
+@pytest.mark.parametrize('key, ciphertext', FIPS_VECTORS)
+def test_backend_vectors(backend, key, ciphertext):
+    cipher = aes_cipher(key, backend)
+    assert cipher.encrypt(FIPS_PLAINTEXT).hex() == ciphertext
+    assert cipher.decrypt(bytes.fromhex(ciphertext)) == FIPS_PLAINTEXT
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_backend_blocks(backend):
+    """
+    Batches of blocks encrypt the same on every backend, and independently of each other.
+    """
+    key = os.urandom(16)
+    blocks = [os.urandom(16) for _ in range(33)]
+    encrypted = encrypt_blocks(blocks, key, backend)
+    assert encrypted == [aes_cipher(key, 'python').encrypt(block) for block in blocks]
+    assert decrypt_blocks(encrypted, key, backend) == blocks
@@ -1,7 +1,11 @@
 # # This challenge works against a specific data set. Fuzzing makes no sense,
 # # therefore, we don't use hypothesis here.
 
-from cryptopals.s1 import detect_ecb
+import io
+import mmap
+import os
+
+from cryptopals.s1 import detect_ecb, detect_ecb_stream, ecb_repetitions, rank_ecb
 
 
 def test_challenge8():
@@ -20,3 +24,33 @@ def test_challenge8():
 
     hex_lines = (bytes.fromhex(line) for line in data_generator())
     assert next(line for line in hex_lines if detect_ecb(line))
+
+
+def test_challenge8_ranked():
+    best = rank_ecb('tests/data/s1c8.txt', top=1)
+    assert best[0][0] == 132
+    assert best[0][1] == ecb_repetitions(bytes.fromhex(open('tests/data/s1c8.txt').read().split()[132]))[0]
+    assert best[0][1] > 0
+
+
+def test_detect_ecb_stream(tmpdir):
+    with open('tests/data/s1c8.txt') as f:
+        line = bytes.fromhex(f.read().split()[132])
+    # random filler has no repeated blocks of its own, so only the record can be found
+    filler = os.urandom(256 * 64)
+    offset = len(filler)
+    dump = filler + line
+    assert not detect_ecb_stream(io.BytesIO(dump[:offset]))
+    assert detect_ecb_stream(io.BytesIO(dump[offset:]))
+    path = tmpdir.join('dump.bin')
+    path.write_binary(dump)
+    with open(str(path), 'rb') as f:
+        assert detect_ecb_stream(f, chunk_size=100)
+        # the scan stops in the chunk holding the record's first repeat
+        assert offset <= f.tell() <= offset + len(line)
+    with open(str(path), 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assert detect_ecb_stream(mapped)
+        assert not detect_ecb_stream(mapped[:offset])
+        mapped.close()
+    assert not detect_ecb_stream(io.BytesIO(bytes(range(256))))
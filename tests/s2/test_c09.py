@@ -1,7 +1,8 @@
+import pytest
 from hypothesis import given, example, note
 from hypothesis.strategies import binary, integers
 
-from cryptopals.s2 import pkcs7pad, pkcs7unpad
+from cryptopals.s2 import PaddingError, pkcs7pad, pkcs7unpad, pkcs7pad_inplace, pkcs7unpad_inplace
 
 def test_challenge9():
     """
@@ -30,3 +31,26 @@ class TestPadding:
     def test_inverse(self, s, blocksize):
         padded = pkcs7pad(s, blocksize)
         assert pkcs7unpad(padded) == s
+
+    @given(binary(min_size=1), integers(min_value=5, max_value=100))
+    def test_inplace(self, s, blocksize):
+        padded = pkcs7pad_inplace(bytearray(s), blocksize)
+        assert padded == pkcs7pad(s, blocksize)
+        assert bytes(pkcs7unpad_inplace(memoryview(bytes(padded)), blocksize)) == s
+        assert pkcs7unpad_inplace(padded, blocksize) == s
+
+    @example(b'ICE ICE BABY\x04\x04\x04\x04', 16)
+    @given(binary(min_size=1), integers(min_value=5, max_value=100))
+    def test_validates(self, s, blocksize):
+        # valid padding is only removed from a multiple of the blocksize
+        if s.endswith(bytes([s[-1]]) * s[-1]) and 0 < s[-1] <= blocksize and len(s) % blocksize == 0:
+            assert pkcs7unpad(s, blocksize) == s[:-s[-1]]
+        else:
+            with pytest.raises(PaddingError):
+                pkcs7unpad(s, blocksize)
+
+@pytest.mark.parametrize('bs', [b'ICE ICE BABY\x05\x05\x05\x05', b'ICE ICE BABY\x01\x02\x03\x04',
+                                b'ICE ICE BABY\x00\x00\x00\x00', b'', b'\x11' * 16])
+def test_invalid_padding(bs):
+    with pytest.raises(PaddingError):
+        pkcs7unpad(bs, 16)
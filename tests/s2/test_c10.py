@@ -1,9 +1,10 @@
 import base64
+from concurrent.futures import ProcessPoolExecutor
 
 from hypothesis import given
-from hypothesis.strategies import binary
+from hypothesis.strategies import binary, lists, integers
 
-from cryptopals.s2 import cbc_encrypt, cbc_decrypt
+from cryptopals.s2 import cbc_encrypt, cbc_decrypt, CBCEncryptor, CBCDecryptor
 
 def test_challenge10():
     """
@@ -27,3 +28,33 @@ def test_cbc(key, plain):
     """
     encrypted = cbc_encrypt(plain, key)
     assert cbc_decrypt(encrypted, key) == plain
+
+
+@given(binary(min_size=16, max_size=16), binary(), lists(integers(min_value=0, max_value=40)))
+def test_cbc_streaming(key, plain, sizes):
+    """
+    Feeding the cipher in chunks of any size gives the same result as one shot.
+    """
+    def feed(crypter, bs):
+        out, pos = b'', 0
+        for size in sizes:
+            out += crypter.update(bs[pos:pos + size])
+            pos += size
+        return out + crypter.update(bs[pos:]) + crypter.finalize()
+
+    encrypted = feed(CBCEncryptor(key), plain)
+    assert encrypted == cbc_encrypt(plain, key)
+    assert feed(CBCDecryptor(key), encrypted) == plain
+
+
+def test_cbc_decrypt_parallel():
+    """
+    Decrypting segments on a process pool gives the same plaintext, wherever the cuts fall.
+    """
+    key, iv = b"YELLOW SUBMARINE", bytes(range(16))
+    plain = bytes(range(256)) * 40 + b'tail'
+    encrypted = cbc_encrypt(plain, key, iv)
+    with ProcessPoolExecutor(2) as pool:
+        for segment_size in [16, 48, 1000, len(encrypted)]:
+            assert cbc_decrypt(encrypted, key, iv, executor=pool, segment_size=segment_size) == plain
+    assert cbc_decrypt(encrypted, key, iv, workers=2, segment_size=64) == plain
@@ -1,13 +1,13 @@
 import os
 import base64
 from collections import Counter
-from Crypto.Cipher import AES
 
 from hypothesis import example, given
 from hypothesis.strategies import binary
 
 from cryptopals.s1 import detect_ecb
-from cryptopals.s2 import encryption_oracle
+from cryptopals.s2 import cbc_encrypt, classify_modes, ecb_encrypt, encryption_oracle
+from cryptopals.s2 import encryption_oracle_samples, evaluate_classifier
 from test_util import slow
 
 @slow
@@ -26,4 +26,38 @@ def test_challenge11(bs):
     if detect_ecb(ciphertext):
         assert encryption_algo == 'ecb'
     # else:
-    # we can't really assert the cbc encryption case
\ No newline at end of file
+    # we can't really assert the cbc encryption case
+
+def test_challenge11_batch():
+    """
+    With planted repeated blocks, every sample of a batch is classified right.
+    """
+    report = evaluate_classifier(encryption_oracle_samples(2000), planted=True)
+    assert report.samples == 2000
+    assert report.accuracy == 1.0
+    assert report.samples_per_second > 0
+
+def test_classify_modes_confidence():
+    key = b'YELLOW SUBMARINE'
+    ecb, cbc = classify_modes([ecb_encrypt(b'A' * 64, key), cbc_encrypt(b'A' * 64, key)])
+    assert ecb.mode == 'ecb' and ecb.repeats == 3 and ecb.blocks == 5
+    assert 0.99 < ecb.confidence <= 1.0
+    assert cbc.mode == 'cbc' and cbc.repeats == 0 and 0.49 < cbc.confidence <= 0.5
+    unique = ecb_encrypt(os.urandom(64), key)
+    planted, = classify_modes(iter([unique]), planted=True)
+    assert planted.mode == 'cbc' and planted.repeats == 0 and planted.blocks == 5
+    assert planted.confidence > cbc.confidence
+
+def test_classify_modes_graded():
+    """
+    With 1-byte blocks chance repeats are common, so the confidence tells apart
+    how far the repeats seen stand out from the ones expected.
+    """
+    # 8 blocks: 28 pairs, 28/256 repeats expected by chance
+    few, many = classify_modes([bytes(range(7)) + b'\x00', b'\x00' * 4 + bytes(range(1, 5))], blocksize=1)
+    assert (few.mode, few.repeats, many.mode, many.repeats) == ('ecb', 1, 'ecb', 3)
+    assert 0.5 < few.confidence < many.confidence < 1.0
+    # no repeats in 2 blocks is likelier under CBC than in 16
+    short, long = classify_modes([bytes(range(2)), bytes(range(16))], blocksize=1, planted=True)
+    assert short.mode == long.mode == 'cbc'
+    assert 0.5 < long.confidence < short.confidence < 1.0
@@ -1,12 +1,16 @@
 import os
+import asyncio
 import base64
 from string import printable
 
-from hypothesis import given, assume
-from hypothesis.strategies import binary, one_of
+import pytest
+from hypothesis import example, given, assume
+from hypothesis.strategies import binary, one_of, sampled_from
 
+from cryptopals import aio
 from cryptopals.s1 import detect_ecb
-from cryptopals.s2 import ecb_encrypt, Oracle, guess_blocksize, guess_unknown_string_size, break_ecb
+from cryptopals.s2 import ecb_encrypt, Oracle, guess_blocksize, guess_unknown_string_size, break_ecb, break_ecb_batched, InstrumentedOracle
+from cryptopals.s2 import profile_oracle, cbc_encrypt, aes_cipher
 from cryptopals.util import shortest_repeater
 from test_util import slow
 
@@ -27,9 +31,12 @@ def test_challenge12():
     assert blocksize == unknown_blocksize
     assert detect_ecb(oracle(b'YELLOW SUBMARINE'*2))
 
-    retrieved_string = break_ecb(oracle)
-    assert retrieved_string.startswith(b'Rollin')
-    assert retrieved_string.endswith(b'drove by')
+    result = break_ecb(oracle)
+    assert result.plaintext.startswith(b'Rollin')
+    assert result.plaintext.endswith(b'drove by')
+    # the discovery probes are shared, and so cached
+    assert result.stats.cache_hits > 0
+    assert result.queries == result.stats.queries > len(unknown)
 
 @given(binary(min_size=8, max_size=64),
        one_of(binary(min_size=16, max_size=16),
@@ -55,4 +62,139 @@ def test_guess_unknown_string_size(unknown_text, key):
     oracle = Oracle(key, unknown_text)
     guess = guess_unknown_string_size(oracle)
 
-    assert guess == len(unknown_text)
\ No newline at end of file
+    assert guess == len(unknown_text)
+
+def test_challenge12_batched():
+    """
+    The batched attack recovers the whole string with one dictionary query per byte,
+    on top of less than two blocks' worth of profile and short-by-n queries.
+    """
+    key = b'\xae\xb7\xe2\x96\xa2\xf9s<,Xr\xdb\x90&\xaa\xf0'
+    with open('tests/data/s2c12.txt', 'rb') as f:
+        unknown = base64.b64decode(f.read())
+
+    result = break_ecb_batched(Oracle(key, unknown))
+    assert result.plaintext == unknown
+    assert result.queries < len(unknown) + 2 * 16
+    assert sum(result.stats.latency_histogram.values()) == result.queries
+
+@given(binary(max_size=64),
+       one_of(binary(min_size=16, max_size=16),
+              binary(min_size=32, max_size=32)),
+       sampled_from([1, 16, 256]))
+def test_break_ecb_batched(unknown_text, key, batch):
+    """
+    Any unknown bytes, printable or not, are recovered.
+    """
+    result = break_ecb_batched(Oracle(key, unknown_text), batch)
+    assert result.plaintext == unknown_text
+
+def test_oracle_shares_cipher():
+    """
+    Oracles and helpers under the same key share one cipher object,
+    and still encrypt exactly like ecb_encrypt.
+    """
+    key, unknown_text = b'YELLOW SUBMARINE', b'unknown'
+    oracle = Oracle(key, unknown_text)
+    assert oracle._cipher is aes_cipher(key)
+    assert Oracle(bytearray(key), unknown_text)._cipher is oracle._cipher
+    for bs in [b'', b'A' * 15, b'A' * 16, os.urandom(100)]:
+        assert oracle(bs) == ecb_encrypt(bs + unknown_text, key)
+
+def test_instrumented_oracle_cache():
+    """
+    Repeated queries are answered from the cache, and accounted for.
+    """
+    oracle = InstrumentedOracle(Oracle(b'YELLOW SUBMARINE', b'unknown'), cache_size=2)
+    for query in [b'a', b'b', b'a', b'c', b'b']:
+        assert oracle(query) == Oracle(b'YELLOW SUBMARINE', b'unknown')(query)
+
+    stats = oracle.stats()
+    # b'b' was evicted when b'c' came in
+    assert stats.queries == 4
+    assert stats.cache_hits == 1
+    assert stats.bytes_in == 5
+    assert stats.bytes_out == 5 * 16
+
+def test_challenge12_async():
+    """
+    The async attack gets the whole string through a local oracle server.
+    """
+    key = b'\xae\xb7\xe2\x96\xa2\xf9s<,Xr\xdb\x90&\xaa\xf0'
+    with open('tests/data/s2c12.txt', 'rb') as f:
+        unknown = base64.b64decode(f.read())
+
+    async def attack():
+        server = await aio.serve_oracle(Oracle(key, unknown), latency=0.001)
+        port = server.sockets[0].getsockname()[1]
+        remote = aio.RemoteOracle('127.0.0.1', port, connections=8)
+        try:
+            assert await aio.guess_blocksize(remote) == 16
+            assert await aio.guess_unknown_string_size(remote) == len(unknown)
+            return await aio.break_ecb(remote, concurrency=8)
+        finally:
+            await remote.close()
+            server.close()
+            await server.wait_closed()
+
+    result = asyncio.run(attack())
+    assert result.plaintext == unknown
+    # every query waited at least the server's latency
+    assert result.stats.latency >= 0.001 * result.queries
+    assert sum(result.stats.latency_histogram.values()) == result.queries
+
+def test_remote_oracle_cancelled():
+    """
+    A query given up on mid-flight doesn't leave its response to the next one.
+    """
+    async def attack():
+        server = await aio.serve_oracle(lambda bs: b'resp:' + bs, latency=0.05)
+        port = server.sockets[0].getsockname()[1]
+        remote = aio.RemoteOracle('127.0.0.1', port, connections=1)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(remote(b'first'), 0.01)
+            return await remote(b'second')
+        finally:
+            await remote.close()
+            server.close()
+            await server.wait_closed()
+
+    assert asyncio.run(attack()) == b'resp:second'
+
+@given(binary(max_size=40), binary(min_size=16, max_size=16), sampled_from([1, 8, 64]))
+def test_break_ecb_async(unknown_text, key, concurrency):
+    oracle = aio.AsyncOracle(Oracle(key, unknown_text))
+    result = asyncio.run(aio.break_ecb(oracle, concurrency))
+    assert result.plaintext == unknown_text
+    # oracle(b'') is asked by both discovery steps, but only sent once
+    assert result.stats.cache_hits >= 1
+
+@given(binary(max_size=40), binary(max_size=64),
+       one_of(binary(min_size=16, max_size=16),
+              binary(min_size=32, max_size=32)),
+       sampled_from(['linear', 'binary']))
+@example(b'\x00' * 32, b'unknown', b'YELLOW SUBMARINE', 'binary')
+@example(b'\x00' * 33, b'\x00' * 32, b'YELLOW SUBMARINE', 'binary')
+@example(b'Z' * 40, b'unknown', b'YELLOW SUBMARINE', 'linear')
+@example(b'x' * 32 + b'abc', b'unknown', b'YELLOW SUBMARINE', 'binary')
+@example(b'AB' * 20, b'AB' * 20, b'YELLOW SUBMARINE', 'binary')
+def test_profile_oracle(prefix, unknown_text, key, search):
+    """
+    Blocksize, sizes and mode all come out of one profile, with or without a prefix.
+    """
+    ecb = lambda bs: ecb_encrypt(prefix + bs + unknown_text, key)
+    assert profile_oracle(ecb, search) == (len(key), len(unknown_text), len(prefix), True)
+
+    cbc = lambda bs: cbc_encrypt(prefix + bs + unknown_text, key)
+    profile = profile_oracle(cbc, search)
+    assert not profile.ecb
+    assert profile.blocksize == len(key)
+    assert profile.unknown_size == len(prefix) + len(unknown_text)
+
+def test_profile_oracle_queries():
+    with open('tests/data/s2c12.txt', 'rb') as f:
+        unknown = base64.b64decode(f.read())
+    oracle = InstrumentedOracle(Oracle(b'YELLOW SUBMARINE', unknown))
+    profile_oracle(oracle)
+    assert oracle.queries < 16
@@ -0,0 +1,50 @@
+import base64
+
+from hypothesis import given
+from hypothesis.strategies import binary, one_of
+
+from cryptopals.s2 import Oracle, PrefixOracle, break_ecb_batched, ecb_encrypt
+
+def test_challenge14():
+    """
+    S2C14 - Byte-at-a-time ECB decryption (Harder)
+    https://cryptopals.com/sets/2/challenges/14
+    """
+    key = b'\xae\xb7\xe2\x96\xa2\xf9s<,Xr\xdb\x90&\xaa\xf0'
+    with open('tests/data/s2c12.txt', 'rb') as f:
+        unknown = base64.b64decode(f.read())
+
+    simple = break_ecb_batched(Oracle(key, unknown))
+    for _ in range(5):
+        result = break_ecb_batched(PrefixOracle(key, unknown))
+        assert result.plaintext == unknown
+        # finding the prefix only costs a few more queries
+        assert result.queries < simple.queries + 16
+
+@given(binary(max_size=70), binary(max_size=64),
+       one_of(binary(min_size=16, max_size=16),
+              binary(min_size=32, max_size=32)))
+def test_break_ecb_prefix(prefix, unknown_text, key):
+    """
+    Any prefix and unknown bytes, printable or not, are recovered.
+    """
+    oracle = PrefixOracle(key, unknown_text, prefix)
+    assert oracle(b'attacker') == ecb_encrypt(prefix + b'attacker' + unknown_text, key)
+    assert break_ecb_batched(oracle, 16).plaintext == unknown_text
+
+def test_break_ecb_prefix_repeated_blocks():
+    """
+    Identical blocks in the prefix aren't mistaken for the planted ones.
+    """
+    key, unknown = b'YELLOW SUBMARINE', b'the unknown string, over a few blocks'
+    for prefix in [b'\x00' * 32, b'\x00' * 33, b'Z' * 40, b'x' * 32 + b'abc', b'AB' * 20]:
+        assert break_ecb_batched(PrefixOracle(key, unknown, prefix)).plaintext == unknown
+
+def test_break_ecb_prefix_aligned_fill():
+    """
+    The prefix is made of fill bytes: its blocks are the same as the planted ones,
+    and with the fill it makes more of them. So does the unknown string.
+    """
+    key, unknown = b'YELLOW SUBMARINE', b'A' * 32 + b'the unknown string'
+    for prefix in [b'A' * 32, b'A' * 35, b'A' * 47, b'\x00' * 16 + b'A' * 45]:
+        assert break_ecb_batched(PrefixOracle(key, unknown, prefix)).plaintext == unknown
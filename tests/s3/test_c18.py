@@ -0,0 +1,44 @@
+import base64
+
+from hypothesis import given
+from hypothesis.strategies import binary, integers
+
+from cryptopals.s2 import aes_cipher
+from cryptopals.s3 import CTR, ctr_crypt, ctr_keystream
+
+def test_challenge18():
+    """
+    S3C18 - Implement CTR, the stream cipher mode
+    https://cryptopals.com/sets/3/challenges/18
+    """
+    ciphertext = base64.b64decode('L77na/nrFsKvynd6HzOoG7GHTLXsTVu9qvY/2syLXzhPweyyMTJULu/6/kXX0KSvoOLSFQ==')
+    plaintext = ctr_crypt(ciphertext, b'YELLOW SUBMARINE')
+    assert plaintext == b"Yo, VIP Let's kick it Ice, Ice, baby Ice, Ice, baby "
+    assert ctr_crypt(plaintext, b'YELLOW SUBMARINE') == ciphertext
+
+def test_ctr_keystream_blocks():
+    """
+    Keystream block n is the encryption of the little endian nonce, then n.
+    """
+    key, nonce = b'YELLOW SUBMARINE', 0x0102030405060708
+    cipher = aes_cipher(key)
+    expected = b''.join(cipher.encrypt(nonce.to_bytes(8, 'little') + n.to_bytes(8, 'little')) for n in range(5))
+    assert ctr_keystream(key, 80, nonce) == expected
+
+@given(binary(max_size=200), integers(min_value=0, max_value=200), integers(min_value=0, max_value=200))
+def test_ctr_seek(plaintext, offset, split):
+    """
+    Any part of the stream can be processed on its own, in any number of updates.
+    """
+    key = b'YELLOW SUBMARINE'
+    ciphertext = ctr_crypt(bytes(offset) + plaintext, key)
+    stream = CTR(key)
+    stream.seek(offset)
+    split = min(split, len(plaintext))
+    assert stream.update(plaintext[:split]) + stream.update(plaintext[split:]) == ciphertext[offset:]
+    assert stream.tell() == offset + len(plaintext)
+    assert ctr_crypt(ciphertext[offset:], key, offset=offset) == plaintext
+
+def test_ctr_crypt_parallel():
+    key, plaintext = b'YELLOW SUBMARINE', bytes(range(256)) * 100
+    assert ctr_crypt(plaintext, key, 3, 5, workers=2, segment_size=1000) == ctr_crypt(plaintext, key, 3, 5)
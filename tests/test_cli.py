@@ -0,0 +1,84 @@
+import io
+import json
+
+from cryptopals.cli import main
+
+def run(*argv):
+    out = io.StringIO()
+    assert main(list(argv), out=out) == 0
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+def test_detect_xor():
+    best, = run('detect-xor', 'tests/data/s1c4.txt')
+    assert (best['record'], best['key']) == (170, '5')
+    assert best['plaintext'] == 'Now that the party is jumping\n'
+
+def test_crack_xor(tmpdir):
+    path = tmpdir.join('lines.txt')
+    path.write('1b37373331363f78151b7f2b783431333d78397828372d363c78373e783a393b3736\nnot hex\n')
+    for workers in [[], ['--workers', '2']]:
+        cracked, bad = run('crack-xor', str(path), *workers)
+        assert cracked['plaintext'] == "Cooking MC's like a pound of bacon"
+        assert bad['record'] == 1 and 'error' in bad
+
+def test_crack_repeating_xor():
+    result, = run('crack-repeating-xor', 'tests/data/s1c6.txt')
+    assert result['key'] == 'Terminator X: Bring the noise'
+
+def test_detect_ecb():
+    results = run('detect-ecb', 'tests/data/s1c8.txt')
+    assert [r['record'] for r in results if r['ecb']] == [132]
+
+def test_cbc_round_trip(tmpdir):
+    plaintext = tmpdir.join('plain.bin')
+    plaintext.write_binary(bytes(range(256)) * 1000)
+    key = ['--key', 'YELLOW SUBMARINE', '--iv-hex', '00' * 15 + '01']
+    encrypted, = run('cbc-encrypt', str(plaintext), '-e', 'raw', *key)
+
+    ciphertext = tmpdir.join('cipher.txt')
+    ciphertext.write(encrypted['ciphertext'])
+    decrypted, = run('cbc-decrypt', str(ciphertext), '-o', 'hex', *key)
+    assert bytes.fromhex(decrypted['plaintext']) == plaintext.read_binary()
+
+def test_cbc_decrypt_challenge10():
+    result, = run('cbc-decrypt', 'tests/data/s2c10.txt', '--key', 'YELLOW SUBMARINE')
+    assert result['plaintext'].startswith("I'm back and I'm ringin' the bell")
+
+def test_cbc_decrypt_errors(tmpdir):
+    """
+    Inputs that don't decrypt get a complete error record, and no plaintext.
+    """
+    bad_hex = tmpdir.join('bad.txt')
+    bad_hex.write('not hex')
+    wrong_key, short_key, not_hex = (
+        run('cbc-decrypt', 'tests/data/s2c10.txt', '--key', 'YELLOW SUBMARINF')[0],
+        run('cbc-decrypt', 'tests/data/s2c10.txt', '--key', 'YELLOW')[0],
+        run('cbc-decrypt', str(bad_hex), '-e', 'hex', '--key', 'YELLOW SUBMARINE')[0])
+    for result in [wrong_key, short_key, not_hex]:
+        assert 'error' in result and 'plaintext' not in result
+
+def test_detect_xor_inputs(tmpdir):
+    """
+    The top candidates are taken over all inputs together.
+    """
+    decoy = tmpdir.join('decoy.txt')
+    decoy.write('\n'.join(bytes(range(i, i + 30)).hex() for i in range(0, 200, 10)) + '\n')
+    for inputs in [(str(decoy), 'tests/data/s1c4.txt'), ('tests/data/s1c4.txt', str(decoy))]:
+        best, = run('detect-xor', *inputs)
+        assert (best['file'], best['record']) == ('tests/data/s1c4.txt', 170)
+    results = run('detect-xor', str(decoy), 'tests/data/s1c4.txt', '--top', '3')
+    assert len(results) == 3
+    assert [r['score'] for r in results] == sorted(r['score'] for r in results)
+    assert run('detect-xor', str(decoy), 'tests/data/s1c4.txt', '--top', '3', '--workers', '2') == results
+
+def test_detect_xor_errors(tmpdir):
+    """
+    Lines that don't decode get an error record, and the scan goes on.
+    """
+    path = tmpdir.join('lines.txt')
+    with open('tests/data/s1c4.txt') as f:
+        path.write('abc\n' + f.read())
+    for workers in [[], ['--workers', '2']]:
+        bad, best = run('detect-xor', str(path), *workers)
+        assert bad['record'] == 0 and 'error' in bad
+        assert (best['record'], best['key']) == (171, '5')
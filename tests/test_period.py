@@ -0,0 +1,37 @@
+import base64
+
+from hypothesis import given, example
+from hypothesis.strategies import binary, integers, text
+
+from cryptopals.period import shortest_period, periods, approximate_periods, keysize_hints
+from cryptopals.s1 import repeating_key_xor
+
+@given(binary(min_size=1), integers(min_value=1, max_value=10))
+@example(b'101', 1)
+def test_periods(bs, i):
+    repeated = bs * i
+    assert shortest_period(repeated) == shortest_period(bs)
+    assert len(bs) in periods(repeated)
+    for p in periods(repeated):
+        assert repeated[:p] * (len(repeated) // p) == repeated
+
+@given(text(min_size=1))
+def test_str_and_memoryview(s):
+    bs = s.encode()
+    assert shortest_period(memoryview(bs)) == shortest_period(bs)
+    assert shortest_period(s + s) <= len(s)
+
+@given(binary(min_size=2))
+def test_exact_approximate_periods(bs):
+    # with no tolerance, p is an approximate period exactly when bs[i] == bs[i + p] everywhere
+    assert approximate_periods(bs) == [p for p in range(1, len(bs)) if bs[p:] == bs[:-p]]
+
+def test_keysize_hints():
+    with open('tests/data/s1c6.txt', 'rb') as f:
+        bs = base64.b64decode(f.read())
+    assert keysize_hints(bs)[0][0] == 29
+
+    with open('tests/data/english_sample.txt', 'rb') as f:
+        text = f.read()
+    for key in ['ICE', 'Bring the noise', 'YELLOW SUBMARINE']:
+        assert keysize_hints(repeating_key_xor(text[:2000], key))[0][0] == len(key)